@@ -1,24 +1,69 @@
 # counter.py
 
-from typing import Dict, Set, List, Tuple
+from typing import Dict, Iterable, Iterator, Sequence, Set, List, Tuple
 from pydantic import BaseModel
+import numpy as np
 import sqlite3
 import os
 import re
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
+from .matcher import TitleMatcher
+from .sketch import SpaceSaving
+from .dense import DenseCounter
+from .ranked import RankedCounter
+from .filters import SeriesFilter, ShowFacets
+from .lru import LRUCache
+from .snapshot import Snapshot, SnapshotPublisher
+
+CONFIG_FILE = "vote_config.json"
 
 class VoteConfig(BaseModel):
     mode: str  # "normal" or "series"
     vote_mode: bool
+    extract: bool = False  # count titles mentioned anywhere in a message
+    max_tracked: int | None = None  # normal mode: cap distinct keys with Space-Saving
+    change_vote: bool = False  # one live vote per user, a new vote replaces the old one
+    # series mode filters; empty lists mean any season / format
+    year_from: int | None = None
+    year_to: int | None = None
+    seasons: List[str] = []
+    formats: List[str] = []
 
 class VoteCounter:
     def __init__(self, db_path: str = "shows.db"):
-        self.config = self.load_config()
-        self.user_votes: Dict[str, Set[str]] = {}  # user -> voted IDs
-        self.votes: Dict[str, int] = {}  # vote key -> count
+        self.config = self.get_config()
+        self.user_votes: Dict[str, Set[str | int]] = {}  # user -> vote keys, or slots in series mode
+        self.live_votes: Dict[str, Tuple[str, int]] = {}  # change_vote: user -> (vote key, slot)
+        self.ranked = RankedCounter()  # normal mode counts, kept in rank order
+        self.votes: Dict[str, int] = self.ranked.counts  # vote key -> count
         self.db_path = os.path.join("assets", db_path)
+        self.alias_ids: Dict[str, int] = {}  # normalized alias -> anime id
+        self.official_aliases: Set[str] = set()  # aliases held as their show's romaji / english title
+        self.dense = DenseCounter()  # series mode counts, one slot per show
+        self.facets = ShowFacets()  # year / season / format per slot, for series filters
         self.valid_titles = self._load_valid_titles()
+        self._matcher: TitleMatcher | None = None
+        self._rebuilding = False  # a matcher build is under way; guarded by _write_lock
+        self.sketch: SpaceSaving | None = None
+        # raw message -> resolved (vote key, slot) pairs; chat repeats itself a lot
+        self.resolved = LRUCache(maxsize=8192)
+        self._index_version = 0
+        # writers (chat, bridge) serialize on this; readers only load the published snapshot
+        self._write_lock = threading.Lock()
+        self.top_n = 10  # ranking size shown live; snapshots judge `exact` on it
+        # live snapshots hold the top `snapshots.size` only, end_counting the full ranking
+        self.snapshots = SnapshotPublisher(self._build_snapshot, self._write_lock, size=self.top_n)
+        # wall-clock times of the window edges, for the history
         self.started_at: datetime | None = None
+        self.ended_at: datetime | None = None
+        # (opens_at, closes_at) on the time.monotonic() clock; votes are judged by their own stamp
+        self.window: Tuple[float, float | None] | None = None
+        # the next scheduled poll's window; votes for it that arrive before it
+        # is opened are held in `_early` and counted when it opens
+        self.next_window: Tuple[float, float] | None = None
+        self._early: List[Tuple[str, str, float]] = []
 
     def _load_valid_titles(self) -> Set[str]:
         path = os.path.abspath(self.db_path)
@@ -28,57 +73,332 @@ class VoteCounter:
 
         conn = sqlite3.connect(path)
         cursor = conn.cursor()
-        cursor.execute("SELECT title_romaji, title_english, synonyms FROM anime")
-
-        titles = set()
-        for row in cursor.fetchall():
-            for value in row[:2]:
-                if value:
-                    titles.add(value.strip().lower())
-            if row[2]:
-                titles.update(s.strip().lower() for s in row[2].split(",") if s.strip())
+        # Aliases are stored pre-normalized (see tools/update_anime.py)
+        cursor.execute("SELECT alias_norm, anime_id FROM anime_alias")
+        self.alias_ids = dict(cursor)
+        cursor.execute("SELECT id, title_romaji, title_english, start_year, season, format FROM anime ORDER BY id")
+        for anime_id, romaji, english, year, season, fmt in cursor:
+            slot = self.dense.add_show(anime_id, self._display_name(romaji, english))
+            self.facets.add_show(slot, year, season, fmt)
+            for title in self._normalize_titles((romaji, english)):
+                if self.alias_ids.get(title) == anime_id:
+                    self.official_aliases.add(title)
 
         conn.close()
-        return titles
+        return set(self.alias_ids)
+
+    @staticmethod
+    def _display_name(romaji: str | None, english: str | None) -> str:
+        return (english or romaji or "").strip().lower()
+
+    @staticmethod
+    def _normalize_titles(titles: Iterable[str | None]) -> Set[str]:
+        return {t.strip().lower() for t in titles if t and t.strip()}
+
+    def add_titles(
+        self,
+        titles: List[str | None],
+        anime_id: int,
+        year: int | None = None,
+        season: str | None = None,
+        fmt: str | None = None,
+    ) -> int:
+        """
+        Add a newly synced show to the live index, returns how many titles were new.
+        `titles` starts with the romaji and english title, as in update_anime.anime_titles;
+        like update_anime.store_anime, those take over aliases held only as synonyms.
+        Runs on the sync thread, so it takes the writers' lock like `vote()`.
+        With extraction on, the new titles reach the automaton through a
+        rebuild in the background, shared by every show synced meanwhile.
+        """
+        with self._write_lock:
+            slot = self.dense.add_show(anime_id, self._display_name(*titles[:2]))
+            self.facets.add_show(slot, year, season, fmt)
+            new = self._normalize_titles(titles) - self.valid_titles
+            for title in new:
+                self.alias_ids[title] = anime_id
+            for title in self._normalize_titles(titles[:2]) - self.official_aliases:
+                self.alias_ids[title] = anime_id
+                self.official_aliases.add(title)
+            self.valid_titles |= new
+            self._index_version += 1
+            rebuild = bool(new) and self._matcher is not None and not self._rebuilding
+            self._rebuilding |= rebuild
+        if rebuild:
+            threading.Thread(target=self._rebuild_matcher, name="matcher-rebuild", daemon=True).start()
+        return len(new)
+
+    @property
+    def matcher(self) -> TitleMatcher:
+        # Normally built by prepare_matcher before extraction mode starts
+        if self._matcher is None:
+            self._matcher = TitleMatcher(self.valid_titles)
+        return self._matcher
+
+    def prepare_matcher(self):
+        """
+        Build the automaton when extraction mode is switched on, off the writers'
+        lock: building it takes around a second, and votes must not wait on it.
+        """
+        if not self.config.extract or self._matcher is not None:
+            return
+        with self._write_lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        self._rebuild_matcher()
 
-    def start_counting(self):
-        self.user_votes.clear()
-        self.votes.clear()
-        self.started_at = datetime.utcnow()
+    def _rebuild_matcher(self):
+        """
+        Build an automaton over the current titles off the writers' lock and
+        swap it in; again while titles were synced during the build.
+        """
+        while True:
+            with self._write_lock:
+                titles = set(self.valid_titles)
+            try:
+                matcher = TitleMatcher(titles)
+            except BaseException:
+                with self._write_lock:
+                    self._rebuilding = False
+                raise
+            with self._write_lock:
+                self._matcher = matcher
+                # memoized resolutions came from the previous automaton
+                self._index_version += 1
+                # titles are only ever added, so equal sizes mean nothing new
+                if len(self.valid_titles) == len(titles):
+                    self._rebuilding = False
+                    return
 
-    def end_counting(self) -> List[Tuple[str, int]]:
-        return self._get_sorted_votes()
+    def start_counting(self, opens_at: float | None = None, closes_at: float | None = None):
+        self.prepare_matcher()
+        with self._write_lock:
+            self.window = (time.monotonic() if opens_at is None else opens_at, closes_at)
+            self.user_votes.clear()
+            self.live_votes.clear()
+            self.dense.clear()
+            self.ranked.clear()
+            # Space-Saving cannot take a vote back, so moved votes need exact counts
+            if self.config.mode == "normal" and self.config.max_tracked and not self.config.change_vote:
+                self.sketch = SpaceSaving(self.config.max_tracked)
+                self.votes = self.sketch.counts
+            else:
+                self.sketch = None
+                self.votes = self.ranked.counts
+            # the opening deadline, not when this call happened to run
+            self.started_at = datetime.utcnow() - timedelta(seconds=time.monotonic() - self.window[0])
+            self.ended_at = None
+            early, self._early = self._early, []
+            self.next_window = None
+            mask = self._series_mask()
+            for user, message, at in early:
+                if self.accepts(at):
+                    for vote_key, slot in self._accept(user, message, mask):
+                        self._count(vote_key, slot)
+        self.snapshots.publish()
+
+    def expect(self, window: Tuple[float, float] | None):
+        """
+        Announce the next scheduled poll's (opens_at, closes_at). The thread that
+        opens it may wake late; votes stamped inside its window meanwhile are
+        kept for it instead of being judged against the previous poll.
+        """
+        with self._write_lock:
+            self.next_window = window
+            self._early = [vote for vote in self._early if window and window[0] <= vote[2] < window[1]]
+
+    def is_exact(self, n: int) -> bool:
+        """Whether the current top `n` is guaranteed to match an unbounded count."""
+        return self.sketch is None or self.sketch.is_exact(n)
+
+    def count_error(self, vote_key: str) -> int:
+        """Upper bound on how much the reported count of `vote_key` is overestimated."""
+        return 0 if self.sketch is None else self.sketch.error(vote_key)
+
+    def end_counting(self) -> Snapshot:
+        with self._write_lock:
+            if self.window is not None:
+                opens_at, closes_at = self.window
+                now = time.monotonic()
+                self.window = (opens_at, now if closes_at is None else min(closes_at, now))
+                if self.started_at is not None:
+                    self.ended_at = self.started_at + timedelta(seconds=self.window[1] - opens_at)
+        # final result must include every vote and every show, not the live top N
+        return self.snapshots.publish(full=True)
+
+    def _hold(self, user: str, message: str, at: float) -> bool:
+        """Keep a vote for the next poll until it opens; windows never overlap."""
+        if self.next_window is not None and self.next_window[0] <= at < self.next_window[1]:
+            self._early.append((user, message, at))
+            return True
+        return False
+
+    def accepts(self, at: float) -> bool:
+        """Whether a vote stamped `at` (time.monotonic()) falls inside the poll window."""
+        if self.window is None:
+            return True
+        opens_at, closes_at = self.window
+        return opens_at <= at and (closes_at is None or at < closes_at)
 
     def set_config(self):
+        self.prepare_matcher()
         with open(CONFIG_FILE, 'w') as f:
-            f.write(self.config.json(indent=2))
+            f.write(self.config.model_dump_json(indent=2))
 
     def get_config(self) -> VoteConfig:
         if os.path.exists(CONFIG_FILE):
             with open(CONFIG_FILE, 'r') as f:
-                return VoteConfig.parse_raw(f.read())
+                return VoteConfig.model_validate_json(f.read())
         return VoteConfig(mode="normal", vote_mode=False)
 
+    @property
+    def series_filter(self) -> SeriesFilter:
+        config = self.config
+        return SeriesFilter(config.year_from, config.year_to, tuple(config.seasons), tuple(config.formats))
+
+    def _series_mask(self) -> np.ndarray | None:
+        """Slots the configured filter lets through, None when every show counts."""
+        if self.config.mode != "series":
+            return None
+        wanted = self.series_filter
+        return self.facets.mask(wanted) if wanted else None
+
+    def _get_sorted_votes(self, n: int | None = None) -> List[Tuple[str, int]]:
+        if self.config.mode == "series":
+            return self.dense.top(n, self._series_mask())
+        if self.sketch is not None:
+            return self.sketch.top(n)
+        return self.ranked.top(n)
+
+    def _build_snapshot(self, n: int | None = None) -> Snapshot:
+        """Top `n` ranking, shows and error bounds, read together under the writers' lock."""
+        if self.config.mode == "series":
+            slots = self.dense.top_slots(n, self._series_mask())
+            ranking = tuple((self.dense.names[slot], int(self.dense.counts[slot])) for slot in slots)
+            return Snapshot(0, ranking, anime_ids=tuple(self.dense.anime_ids[slot] for slot in slots))
+
+        ranking = tuple(self._get_sorted_votes(n))
+        anime_ids = tuple(self.alias_ids.get(vote_key) for vote_key, _ in ranking)
+        if self.sketch is None:
+            return Snapshot(0, ranking, anime_ids=anime_ids)
+        errors = tuple(self.sketch.error(vote_key) for vote_key, _ in ranking)
+        return Snapshot(0, ranking, anime_ids=anime_ids, errors=errors, exact=self.sketch.is_exact(self.top_n))
+
     def get_state(self) -> Tuple[List[Tuple[str, int]], datetime | None]:
-        return self._get_sorted_votes(), self.started_at
+        return list(self.snapshots.current.ranking), self.started_at
+
+    def snapshot(self) -> Snapshot:
+        """Latest published ranking; immutable, safe to share between threads."""
+        return self.snapshots.current
 
     def notify_update(self):
-        # Placeholder for event firing or callback mechanism
-        pass
+        self.snapshots.mark_dirty()
 
-    def vote(self, user: str, message: str):
+    def _vote_keys(self, message: str) -> List[str]:
+        if self.config.extract:
+            return self.matcher.find(message)
         vote_key = message.strip().lower()
         if self.config.mode == "series" and vote_key not in self.valid_titles:
+            return []
+        return [vote_key]
+
+    def _resolve(self, message: str) -> Tuple[Tuple[str, int], ...]:
+        """(vote key, series slot or -1) for each vote in `message`, memoized per raw text."""
+        self.resolved.validate((self.config.mode, self.config.extract, self._index_version))
+        resolved = self.resolved.get(message)
+        if resolved is not LRUCache.MISSING:
+            return resolved
+
+        series = self.config.mode == "series"
+        resolved = []
+        for vote_key in self._vote_keys(message):
+            slot = -1
+            if series:
+                # every alias of a show counts towards the same slot; the
+                # display name is not unique, so the slot is what identifies it
+                slot = self.dense.slot_of[self.alias_ids[vote_key]]
+                vote_key = self.dense.names[slot]
+            resolved.append((vote_key, slot))
+
+        resolved = tuple(resolved)
+        self.resolved.put(message, resolved)
+        return resolved
+
+    def _accept(self, user: str, message: str, mask: np.ndarray | None = None) -> Iterator[Tuple[str, int]]:
+        """Yield (vote key, series slot or -1) for every vote in `message` that counts."""
+        resolved = self._resolve(message)
+        if mask is not None:
+            resolved = [(vote_key, slot) for vote_key, slot in resolved if mask[slot]]
+        if self.config.change_vote:
+            yield from self._move(user, resolved)
             return
+        for vote_key, slot in resolved:
+            if self.config.vote_mode:
+                voted = slot if slot >= 0 else vote_key
+                if user not in self.user_votes:
+                    self.user_votes[user] = set()
+                if voted in self.user_votes[user]:
+                    continue
+                self.user_votes[user].add(voted)
 
-        if self.config.vote_mode:
-            if user not in self.user_votes:
-                self.user_votes[user] = set()
-            if vote_key in self.user_votes[user]:
-                return
-            self.user_votes[user].add(vote_key)
+            yield vote_key, slot
 
-        self.votes[vote_key] = self.votes.get(vote_key, 0) + 1
-        self.notify_update()
+    def _move(self, user: str, resolved: Sequence[Tuple[str, int]]) -> Iterator[Tuple[str, int]]:
+        """change_vote: retract the user's live vote and yield its replacement, if any."""
+        if not resolved:
+            return
+        vote = resolved[0]  # one live vote: the first title a message names
+        previous = self.live_votes.get(user)
+        if previous == vote:
+            return
+        if previous is not None:
+            self._retract(*previous)
+        self.live_votes[user] = vote
+        yield vote
+
+    def _count(self, vote_key: str, slot: int):
+        if slot >= 0:
+            self.dense.add(slot)
+        elif self.sketch is not None:
+            self.sketch.add(vote_key)
+        else:
+            self.ranked.increment(vote_key)
 
+    def _retract(self, vote_key: str, slot: int):
+        if slot >= 0:
+            self.dense.add(slot, -1)
+        else:
+            self.ranked.decrement(vote_key)
 
+    def vote(self, user: str, message: str, at: float | None = None):
+        counted = False
+        at = time.monotonic() if at is None else at
+        with self._write_lock:
+            if self._hold(user, message, at) or not self.accepts(at):
+                return
+            for vote_key, slot in self._accept(user, message, self._series_mask()):
+                self._count(vote_key, slot)
+                counted = True
+
+        if counted:
+            self.notify_update()
+
+    def vote_batch(self, messages: Iterable[Tuple[str, str, float]]):
+        """
+        Count many (user, message, time.monotonic() stamp) votes, each judged by
+        its own stamp; series votes are applied as one array update.
+        """
+        slots: List[int] = []
+        with self._write_lock:
+            mask = self._series_mask()
+            for user, message, at in messages:
+                if self._hold(user, message, at) or not self.accepts(at):
+                    continue
+                for vote_key, slot in self._accept(user, message, mask):
+                    if slot >= 0:
+                        slots.append(slot)
+                    else:
+                        self._count(vote_key, slot)
+            self.dense.add_many(slots)
+        self.notify_update()
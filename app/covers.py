@@ -0,0 +1,217 @@
+# covers.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Tuple
+
+import requests
+
+CACHE_DIR = os.path.join("cache", "covers")
+
+Image = Tuple[bytes, str, float]  # data, content type, fetched_at
+
+
+class CoverCache:
+    """
+    Two-level LRU cache for show cover images: a small in-memory layer in front
+    of a size-bounded directory on disk. Entries older than `max_age` are
+    revalidated with If-None-Match / If-Modified-Since, and a stale copy is
+    served if the CDN can't be reached.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        cache_dir: str = CACHE_DIR,
+        max_disk_bytes: int = 64 * 1024 * 1024,
+        max_memory_bytes: int = 8 * 1024 * 1024,
+        max_age: float = 24 * 60 * 60,
+        workers: int = 4,
+    ):
+        self.db_path = db_path
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.max_age = max_age
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[int, Image]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[int, int]" = OrderedDict()  # anime id -> size, oldest access first
+        self._disk_bytes = 0
+        self._inflight: set[int] = set()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cover")
+        self._session = requests.Session()
+        self._scan_disk()
+
+    # ── lookups ────────────────────────────────────
+
+    def _query(self, sql: str, params: tuple):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(sql, params).fetchone()
+        finally:
+            conn.close()
+
+    def _cover_url(self, anime_id: int) -> str | None:
+        row = self._query("SELECT cover_image FROM anime WHERE id = ?", (anime_id,))
+        return row[0] if row else None
+
+    # ── disk layer ─────────────────────────────────
+
+    def _paths(self, anime_id: int) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, str(anime_id))
+        return base + ".img", base + ".json"
+
+    def _scan_disk(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".img"):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            entries.append((stat.st_mtime, int(name[:-4]), stat.st_size))
+        for _, anime_id, size in sorted(entries):
+            self._disk[anime_id] = size
+            self._disk_bytes += size
+
+    def _read_disk(self, anime_id: int) -> Tuple[bytes, dict] | None:
+        img_path, meta_path = self._paths(anime_id)
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            with open(img_path, "rb") as f:
+                data = f.read()
+            os.utime(img_path)  # mtime doubles as last access for eviction order
+            return data, meta
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, anime_id: int, data: bytes, meta: dict, revalidated: bool = False):
+        """
+        Store a cover. After a 304 (`revalidated`) only its metadata is
+        rewritten, unless another fetch evicted the image in the meantime.
+        """
+        img_path, meta_path = self._paths(anime_id)
+        with self._lock:
+            if revalidated and anime_id in self._disk:
+                with open(meta_path, "w") as f:
+                    json.dump(meta, f)
+                self._disk.move_to_end(anime_id)
+                return
+        tmp = img_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, img_path)
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+        with self._lock:
+            self._disk_bytes += len(data) - self._disk.get(anime_id, 0)
+            self._disk[anime_id] = len(data)
+            self._disk.move_to_end(anime_id)
+            while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+                evicted, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                for path in self._paths(evicted):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    # ── memory layer ───────────────────────────────
+
+    def _remember(self, anime_id: int, image: Image):
+        with self._lock:
+            old = self._memory.pop(anime_id, None)
+            if old is not None:
+                self._memory_bytes -= len(old[0])
+            self._memory[anime_id] = image
+            self._memory_bytes += len(image[0])
+            while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                _, (data, _, _) = self._memory.popitem(last=False)
+                self._memory_bytes -= len(data)
+
+    # ── public api ─────────────────────────────────
+
+    def get(self, anime_id: int) -> Tuple[bytes, str] | None:
+        """Return (image bytes, content type), fetching or revalidating as needed."""
+        with self._lock:
+            image = self._memory.get(anime_id)
+            if image is not None:
+                self._memory.move_to_end(anime_id)
+                if anime_id in self._disk:
+                    self._disk.move_to_end(anime_id)
+
+        if image is None or time.time() - image[2] >= self.max_age:
+            image = self._fetch(anime_id, self._read_disk(anime_id))
+            if image is None:
+                return None
+            self._remember(anime_id, image)
+        return image[0], image[1]
+
+    def prefetch(self, anime_ids: Iterable[int]):
+        """Warm the cache for the given shows in the background."""
+        for anime_id in anime_ids:
+            with self._lock:
+                if anime_id in self._memory or anime_id in self._inflight:
+                    continue
+                self._inflight.add(anime_id)
+            self._pool.submit(self._prefetch_one, anime_id)
+
+    def _prefetch_one(self, anime_id: int):
+        try:
+            self.get(anime_id)
+        except Exception as e:
+            print(f"Cover prefetch failed for {anime_id}: {e}")
+        finally:
+            with self._lock:
+                self._inflight.discard(anime_id)
+
+    def _fetch(self, anime_id: int, cached: Tuple[bytes, dict] | None) -> Image | None:
+        if cached is not None:
+            data, meta = cached
+            stale: Image | None = (data, meta["content_type"], meta["fetched_at"])
+            if time.time() - meta["fetched_at"] < self.max_age:
+                return stale
+        else:
+            stale = None
+
+        url = cached[1]["url"] if cached else self._cover_url(anime_id)
+        if not url:
+            return None
+
+        headers = {}
+        if cached is not None:
+            if cached[1].get("etag"):
+                headers["If-None-Match"] = cached[1]["etag"]
+            if cached[1].get("last_modified"):
+                headers["If-Modified-Since"] = cached[1]["last_modified"]
+
+        try:
+            response = self._session.get(url, headers=headers, timeout=10)
+        except requests.RequestException as e:
+            print(f"Could not fetch cover {url}: {e}")
+            return stale
+
+        if response.status_code == 304 and cached is not None:
+            meta = dict(cached[1], fetched_at=time.time())
+            self._write_disk(anime_id, cached[0], meta, revalidated=True)
+            return cached[0], meta["content_type"], meta["fetched_at"]
+
+        if response.status_code != 200:
+            return stale
+
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_type": response.headers.get("Content-Type", "image/jpeg"),
+            "fetched_at": time.time(),
+        }
+        self._write_disk(anime_id, response.content, meta)
+        return response.content, meta["content_type"], meta["fetched_at"]
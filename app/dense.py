@@ -0,0 +1,70 @@
+# dense.py
+
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+class DenseCounter:
+    """
+    Series-mode vote counts in a flat int64 array, one slot per show.
+    `anime.id` is mapped to a dense slot once; counting is then plain array
+    indexing and the top-N is an argpartition instead of a full sort.
+    """
+
+    def __init__(self, shows: Iterable[Tuple[int, str]] = ()):
+        self.slot_of: Dict[int, int] = {}  # anime id -> slot
+        self.anime_ids: List[int] = []  # slot -> anime id
+        self.names: List[str] = []  # slot -> display name, not unique
+        self.counts = np.zeros(0, dtype=np.int64)
+        for anime_id, name in shows:
+            self.add_show(anime_id, name)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add_show(self, anime_id: int, name: str) -> int:
+        slot = self.slot_of.get(anime_id)
+        if slot is not None:
+            return slot
+        slot = len(self.names)
+        self.slot_of[anime_id] = slot
+        self.anime_ids.append(anime_id)
+        self.names.append(name)
+        if slot >= len(self.counts):
+            # grow geometrically so a catalogue sync doesn't copy per show
+            grown = np.zeros(max(16, 2 * len(self.counts)), dtype=np.int64)
+            grown[:len(self.counts)] = self.counts
+            self.counts = grown
+        return slot
+
+    def clear(self):
+        self.counts.fill(0)
+
+    def add(self, slot: int, n: int = 1):
+        self.counts[slot] += n
+
+    def add_many(self, slots: Iterable[int]):
+        """Apply a batch of votes in one vectorised pass."""
+        slots = np.fromiter(slots, dtype=np.intp)
+        if len(slots):
+            self.counts += np.bincount(slots, minlength=len(self.counts))
+
+    def top_slots(self, n: int | None = None, mask: np.ndarray | None = None) -> np.ndarray:
+        """Slots with votes, highest counts first; `mask` (bool per slot) restricts them."""
+        counts = self.counts[:len(self.names)]
+        voted = np.flatnonzero(counts if mask is None else (counts != 0) & mask)
+        if n is not None and n < len(voted):
+            # the n-th highest count, then ties for it in slot order: the same
+            # shows as the first n of a full sort
+            kth = -np.partition(-counts[voted], n - 1)[n - 1]
+            above = voted[counts[voted] > kth]
+            voted = np.concatenate((above, voted[counts[voted] == kth][:n - len(above)]))
+        # stable sort on -count keeps ties in slot order, like sorted() on a dict
+        return voted[np.argsort(-counts[voted], kind="stable")]
+
+    def top(self, n: int | None = None, mask: np.ndarray | None = None) -> List[Tuple[str, int]]:
+        return [(self.names[slot], int(self.counts[slot])) for slot in self.top_slots(n, mask)]
+
+    def total(self) -> int:
+        return int(self.counts.sum())
@@ -0,0 +1,112 @@
+# filters.py
+
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class SeriesFilter:
+    year_from: int | None = None
+    year_to: int | None = None
+    seasons: Tuple[str, ...] = ()  # empty: any season
+    formats: Tuple[str, ...] = ()  # empty: any format
+
+    def __bool__(self) -> bool:
+        return bool(self.year_from or self.year_to or self.seasons or self.formats)
+
+    def matches(self, year: int, season: str, fmt: str) -> bool:
+        """Check a single show, as stored by ShowFacets (0 / "" when unknown)."""
+        if self.year_from or self.year_to:
+            if not year or year < (self.year_from or 1) or (self.year_to and year > self.year_to):
+                return False
+        if self.seasons and season not in (value.upper() for value in self.seasons):
+            return False
+        return not self.formats or fmt in (value.upper() for value in self.formats)
+
+
+class ShowFacets:
+    """
+    Start year, season and format of every series-mode show, by dense slot.
+    The index (one boolean mask per season and per format value, plus the
+    slots sorted by start year) is built once after the catalogue loads or
+    grows. A filter is then a few mask ORs/ANDs and a searchsorted, cached
+    per filter, so switching filters mid-poll costs next to nothing and
+    checking a vote is a single `mask[slot]`. Shows synced mid-poll extend
+    the cached masks by one bit instead of invalidating them.
+    """
+
+    def __init__(self):
+        self.years: List[int] = []  # slot -> start year, 0 if unknown
+        self.seasons: List[str] = []  # slot -> season, "" if unknown
+        self.formats: List[str] = []  # slot -> format, "" if unknown
+        self._index: Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray], np.ndarray, np.ndarray] | None = None
+        self._masks: Dict[SeriesFilter, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.years)
+
+    def add_show(self, slot: int, year: int | None, season: str | None, fmt: str | None):
+        facets = (year or 0, (season or "").upper(), (fmt or "").upper())
+        if slot < len(self.years):
+            self.years[slot], self.seasons[slot], self.formats[slot] = facets
+            for wanted, allowed in self._masks.items():
+                allowed[slot] = wanted.matches(*facets)
+            # a show changing facets is rare, rebuild when the next new filter needs it
+            self._index = None
+            return
+
+        self.years.append(facets[0])
+        self.seasons.append(facets[1])
+        self.formats.append(facets[2])
+        for wanted, allowed in self._masks.items():
+            self._masks[wanted] = np.append(allowed, wanted.matches(*facets))
+        if self._index is not None:
+            self._extend_index(slot, *facets)
+
+    def _extend_index(self, slot: int, year: int, season: str, fmt: str):
+        season_masks, format_masks, order, sorted_years = self._index
+        for masks, value in ((season_masks, season), (format_masks, fmt)):
+            for key in masks:
+                masks[key] = np.append(masks[key], key == value)
+            if value and value not in masks:
+                masks[value] = np.zeros(slot + 1, dtype=bool)
+                masks[value][slot] = True
+        at = np.searchsorted(sorted_years, year, side="right")
+        self._index = (season_masks, format_masks, np.insert(order, at, slot), np.insert(sorted_years, at, year))
+
+    @staticmethod
+    def _value_masks(values: List[str]) -> Dict[str, np.ndarray]:
+        unique, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+        return {value: codes == code for code, value in enumerate(unique) if value}
+
+    def _build(self):
+        years = np.array(self.years, dtype=np.int32)
+        order = np.argsort(years, kind="stable")
+        self._index = (self._value_masks(self.seasons), self._value_masks(self.formats), order, years[order])
+
+    def mask(self, wanted: SeriesFilter) -> np.ndarray:
+        """Boolean array over slots, True where the show passes `wanted`."""
+        allowed = self._masks.get(wanted)
+        if allowed is not None:
+            return allowed
+        if self._index is None:
+            self._build()
+        season_masks, format_masks, order, sorted_years = self._index
+        none = np.zeros(len(self.years), dtype=bool)
+
+        allowed = np.ones(len(self.years), dtype=bool)
+        for values, masks in ((wanted.seasons, season_masks), (wanted.formats, format_masks)):
+            if values:
+                allowed &= np.logical_or.reduce([masks.get(value.upper(), none) for value in values])
+        if wanted.year_from or wanted.year_to:
+            # unknown years (0) fall outside any range
+            low = np.searchsorted(sorted_years, wanted.year_from or 1, side="left")
+            high = len(sorted_years) if not wanted.year_to else np.searchsorted(sorted_years, wanted.year_to, side="right")
+            in_range = none.copy()
+            in_range[order[low:high]] = True
+            allowed &= in_range
+
+        self._masks[wanted] = allowed
+        return allowed
@@ -0,0 +1,156 @@
+# history.py
+
+import csv
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+
+HISTORY_DB = "history.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS poll (
+    poll_id TEXT PRIMARY KEY,
+    started_at TEXT,
+    ended_at TEXT NOT NULL,
+    duration REAL,
+    mode TEXT,
+    vote_mode INTEGER,
+    total_votes INTEGER NOT NULL,
+    winner TEXT,
+    winner_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS poll_ended_at_id ON poll (ended_at, poll_id);
+CREATE INDEX IF NOT EXISTS poll_winner ON poll (winner);
+
+CREATE TABLE IF NOT EXISTS poll_result (
+    poll_id TEXT NOT NULL REFERENCES poll (poll_id),
+    rank INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (poll_id, rank)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS poll_result_name ON poll_result (name);
+"""
+
+POLL_COLUMNS = (
+    "poll_id", "started_at", "ended_at", "duration", "mode",
+    "vote_mode", "total_votes", "winner", "winner_count",
+)
+EXPORT_COLUMNS = POLL_COLUMNS + ("rank", "name", "count")
+
+
+class HistoryStore:
+    """Append-only record of finished polls, kept in a local SQLite file."""
+
+    def __init__(self, db_path: str = HISTORY_DB):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def record(
+        self,
+        poll_id: str,
+        results: Sequence[Tuple[str, int]],
+        started_at: datetime | None,
+        ended_at: datetime,
+        mode: str,
+        vote_mode: bool,
+    ):
+        """Write a finished poll and its full ranking in one transaction."""
+        duration = (ended_at - started_at).total_seconds() if started_at else None
+        winner, winner_count = results[0] if results else (None, None)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM poll_result WHERE poll_id = ?", (poll_id,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO poll VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    poll_id,
+                    started_at.isoformat() if started_at else None,
+                    ended_at.isoformat(),
+                    duration,
+                    mode,
+                    int(vote_mode),
+                    sum(count for _, count in results),
+                    winner,
+                    winner_count,
+                ),
+            )
+            self._conn.executemany(
+                "INSERT INTO poll_result VALUES (?, ?, ?, ?)",
+                ((poll_id, rank, name, count) for rank, (name, count) in enumerate(results, 1)),
+            )
+
+    def page(self, limit: int = 20, before: Tuple[str, str] | None = None) -> List[Dict]:
+        """
+        Newest-first page of polls. `before` is the (`ended_at`, `poll_id`) of
+        the last poll of the previous page, so every page is a single index
+        range scan and polls ending at the same instant are never skipped.
+        """
+        query = f"SELECT {', '.join(POLL_COLUMNS)} FROM poll"
+        params: tuple = ()
+        if before:
+            query += " WHERE (ended_at, poll_id) < (?, ?)"
+            params = tuple(before)
+        query += " ORDER BY ended_at DESC, poll_id DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, params + (limit,)).fetchall()
+        return [dict(zip(POLL_COLUMNS, row)) for row in rows]
+
+    def results(self, poll_id: str, limit: int | None = None) -> List[Tuple[str, int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, count FROM poll_result WHERE poll_id = ? ORDER BY rank LIMIT ?",
+                (poll_id, -1 if limit is None else limit),
+            ).fetchall()
+        return [(name, count) for name, count in rows]
+
+    def _export_rows(self):
+        cursor = self._conn.execute(
+            f"SELECT {', '.join('p.' + c for c in POLL_COLUMNS)}, r.rank, r.name, r.count "
+            "FROM poll p JOIN poll_result r USING (poll_id) ORDER BY p.ended_at, r.rank"
+        )
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            yield from rows
+
+    def export(self, path: str, fmt: str | None = None) -> int:
+        """
+        Export every poll result row to `path`. Formats:
+          csv      one row per (poll, rank)
+          json     list of row objects
+          columns  columnar JSON: {column: [values...]}, ready for pandas/arrow
+        """
+        fmt = fmt or os.path.splitext(path)[1].lstrip(".") or "csv"
+        if fmt not in ("csv", "json", "columns"):
+            raise ValueError(f"Unknown export format: {fmt}")
+
+        with self._lock:
+            if fmt == "csv":
+                count = 0
+                with open(path, "w", newline="", encoding="utf-8") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(EXPORT_COLUMNS)
+                    for row in self._export_rows():
+                        writer.writerow(row)
+                        count += 1
+                return count
+            rows = list(self._export_rows())
+
+        if fmt == "json":
+            data = [dict(zip(EXPORT_COLUMNS, row)) for row in rows]
+        else:
+            data = {col: [row[i] for row in rows] for i, col in enumerate(EXPORT_COLUMNS)}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
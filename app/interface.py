@@ -4,15 +4,39 @@ from typing import Optional, List
 from pydantic import BaseModel
 from webview import Window
 from tools.interface import expose
-from typing import Dict, Set, List
+from typing import Dict, Set, List, Tuple
+import asyncio
+import atexit
+import threading
+import time
+from uuid import uuid4
+from datetime import datetime
+from .profiling import SamplingProfiler
+from .history import HistoryStore
+from .covers import CoverCache
+from .irc import ChatReader
+from .shm import RankingWriter
+from .scheduler import PollScheduler, ScheduledPoll
+from .snapshot import Snapshot
+from .counter import VoteCounter, VoteConfig as CounterConfig
 
 class VoteConfig(BaseModel):
     mode: str  # "normal" or "series"
     vote_mode: bool
+    extract: bool = False  # count titles mentioned anywhere in a message
+    max_tracked: Optional[int] = None  # normal mode: cap distinct keys with Space-Saving
+    change_vote: bool = False  # one live vote per user, a new vote replaces the old one
+    # series mode filters; empty lists mean any season / format
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    seasons: List[str] = []  # e.g. "WINTER", "SPRING", "SUMMER", "FALL"
+    formats: List[str] = []  # e.g. "TV", "TV_SHORT", "MOVIE"
 
 class VoteEntry(BaseModel):
     name: str
     count: int
+    anime_id: Optional[int] = None  # the show, names are not unique
+    error: int = 0  # count may be overestimated by up to this much
 
 class VoteRequest(BaseModel):
     user: str
@@ -20,16 +44,113 @@ class VoteRequest(BaseModel):
 
 class VoteResults(BaseModel):
     results: List[VoteEntry]
+    exact: bool = True  # False when the top-N may differ from an unbounded count
+    version: int = 0  # snapshot version, pass back as known_version to skip unchanged results
+    changed: bool = True
+
+class ResultsQuery(BaseModel):
+    known_version: Optional[int] = None
 
 class EmptyInput(BaseModel):
     pass
 
+class ProfileRequest(BaseModel):
+    poll_id: Optional[str] = None
+
+class ProfileStatus(BaseModel):
+    running: bool
+    poll_id: Optional[str] = None
+    samples: int = 0
+    output: Optional[str] = None
+
+class HistoryCursor(BaseModel):
+    # the last poll on the previous page
+    ended_at: str
+    poll_id: str
+
+class HistoryQuery(BaseModel):
+    limit: int = 20
+    before: Optional[HistoryCursor] = None
+
+class PollSummary(BaseModel):
+    poll_id: str
+    started_at: Optional[str] = None
+    ended_at: str
+    duration: Optional[float] = None
+    mode: Optional[str] = None
+    vote_mode: bool = False
+    total_votes: int
+    winner: Optional[str] = None
+    winner_count: Optional[int] = None
+
+class HistoryPage(BaseModel):
+    polls: List[PollSummary]
+    next_before: Optional[HistoryCursor] = None
+
+class CoverRequest(BaseModel):
+    name: str
+    anime_id: Optional[int] = None  # from VoteEntry, preferred over the name
+
+class CoverInfo(BaseModel):
+    anime_id: Optional[int] = None
+    url: Optional[str] = None
+
+class CacheStats(BaseModel):
+    size: int
+    hits: int
+    misses: int
+    hit_rate: float
+
+class ChatRequest(BaseModel):
+    channel: str
+
+class ChatStatus(BaseModel):
+    channel: Optional[str] = None
+    connected: bool = False
+
+class ScheduleRequest(BaseModel):
+    duration: float  # seconds
+    delay: float = 0.0  # seconds after the previous queued poll ends
+
+class ScheduledPollInfo(BaseModel):
+    poll_id: str
+    opens_in: float  # seconds from now, negative once open
+    closes_in: float
+
+class ScheduleStatus(BaseModel):
+    active: Optional[ScheduledPollInfo] = None
+    pending: List[ScheduledPollInfo]
+
+class SyncStatus(BaseModel):
+    running: bool
+    titles: int
+
 
 class API:
     def __init__(self):
-        self.config = VoteConfig(mode="normal", vote_mode=False)
-        self.user_votes: Dict[str, Set[str]] = {}  # username -> set of voted show ids
-        self.votes: Dict[str, int] = {}  # show id -> count
+        self.counter = VoteCounter()
+        self.config = VoteConfig(**self.counter.config.model_dump())
+        self.poll_id: Optional[str] = None
+        self._sync_thread: Optional[threading.Thread] = None
+        self.covers = CoverCache(self.counter.db_path)
+        # every vote path publishes a snapshot: warm covers as shows enter the top N
+        self.counter.snapshots.subscribe(self._prefetch_covers)
+        self.server_url: Optional[str] = None  # set by main.start once the local server runs
+        self._chat: Optional[ChatReader] = None
+        self._results: VoteResults = VoteResults(results=[])
+        self.shared: Optional[RankingWriter] = None
+        try:
+            self.shared = RankingWriter()
+            self.counter.snapshots.subscribe(lambda snapshot: self.shared.write(snapshot.version, snapshot.ranking))
+            # live snapshots must fill the segment, not just the top N shown
+            self.counter.snapshots.size = max(self.counter.top_n, self.shared.capacity)
+            atexit.register(self.shared.close)
+        except OSError as e:
+            print(f"Shared ranking unavailable: {e}")
+        self._chat_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.profiler = SamplingProfiler()
+        self.history = HistoryStore()
+        self.scheduler = PollScheduler(self._open_scheduled, self._close_scheduled)
 
     @expose(EmptyInput, VoteConfig)
     def get_config(self, _: EmptyInput) -> VoteConfig:
@@ -38,41 +159,227 @@ class API:
     @expose(VoteConfig, VoteConfig)
     def set_config(self, new_config: VoteConfig) -> VoteConfig:
         self.config = new_config
+        self.counter.config = CounterConfig(**new_config.model_dump())
+        self.counter.set_config()
+        # filters apply to the live ranking too, republish it
+        self.counter.notify_update()
         return self.config
 
     @expose(EmptyInput, EmptyInput)
     def start_counting(self, _: EmptyInput) -> EmptyInput:
-        self.user_votes.clear()
-        self.votes.clear()
+        self._open_poll(uuid4().hex[:8])
         return EmptyInput()
 
     @expose(EmptyInput, VoteResults)
     def end_counting(self, _: EmptyInput) -> VoteResults:
+        return self._close_poll()
+
+    @expose(ScheduleRequest, ScheduleStatus)
+    def schedule_poll(self, request: ScheduleRequest) -> ScheduleStatus:
+        self.scheduler.schedule(request.duration, request.delay)
+        self._expect_next()
+        return self._schedule_status()
+
+    @expose(EmptyInput, ScheduleStatus)
+    def cancel_scheduled(self, _: EmptyInput) -> ScheduleStatus:
+        self.scheduler.cancel_pending()
+        self._expect_next()
+        return self._schedule_status()
+
+    @expose(EmptyInput, ScheduleStatus)
+    def get_schedule(self, _: EmptyInput) -> ScheduleStatus:
+        return self._schedule_status()
+
+    def _open_scheduled(self, poll: ScheduledPoll):
+        self._open_poll(poll.poll_id, poll.opens_at, poll.closes_at)
+
+    def _close_scheduled(self, poll: ScheduledPoll):
+        if self.poll_id == poll.poll_id:
+            self._close_poll()
+
+    def _expect_next(self):
+        pending = self.scheduler.pending()
+        self.counter.expect((pending[0].opens_at, pending[0].closes_at) if pending else None)
+
+    def _schedule_status(self) -> ScheduleStatus:
+        now = time.monotonic()
+
+        def info(poll: ScheduledPoll) -> ScheduledPollInfo:
+            return ScheduledPollInfo(poll_id=poll.poll_id, opens_in=poll.opens_at - now, closes_in=poll.closes_at - now)
+
+        active = self.scheduler.active
+        return ScheduleStatus(
+            active=info(active) if active else None,
+            pending=[info(poll) for poll in self.scheduler.pending()],
+        )
+
+    def _open_poll(self, poll_id: str, opens_at: Optional[float] = None, closes_at: Optional[float] = None):
+        # poll_id first: chat votes arriving meanwhile must still reach the counter
+        self.poll_id = poll_id
+        self.counter.start_counting(opens_at, closes_at)
+        self._expect_next()
+        if self.profiler.auto_capture:
+            self.profiler.stop()
+            self.profiler.start(self.poll_id)
+
+    def _close_poll(self) -> VoteResults:
         # Finalize the vote and fire event to frontend with top N
-        sorted_result = self._get_sorted_votes()
+        # the full final ranking; live snapshots published later only hold the top N
+        sorted_result = self._results_for(self.counter.end_counting())
         #js_api.window.dispatchEvent(js.CustomEvent.new("ranking:update", {"detail": sorted_result.dict()}))
+        if self.poll_id is not None:
+            self.history.record(
+                self.poll_id,
+                [(entry.name, entry.count) for entry in sorted_result.results],
+                self.counter.started_at,
+                self.counter.ended_at or datetime.utcnow(),
+                self.config.mode,
+                self.config.vote_mode,
+            )
+            self.poll_id = None
+        if self.profiler.auto_capture:
+            self.profiler.stop()
         return sorted_result
 
+    @expose(HistoryQuery, HistoryPage)
+    def get_history(self, query: HistoryQuery) -> HistoryPage:
+        limit = max(1, min(query.limit, 100))
+        before = (query.before.ended_at, query.before.poll_id) if query.before else None
+        polls = [PollSummary(**row) for row in self.history.page(limit, before)]
+        next_before = None
+        if len(polls) == limit:
+            next_before = HistoryCursor(ended_at=polls[-1].ended_at, poll_id=polls[-1].poll_id)
+        return HistoryPage(polls=polls, next_before=next_before)
+
+    @expose(ProfileRequest, ProfileStatus)
+    def start_profiling(self, request: ProfileRequest) -> ProfileStatus:
+        self.profiler.start(request.poll_id or self.poll_id or "adhoc")
+        return self._profile_status()
+
+    @expose(EmptyInput, ProfileStatus)
+    def stop_profiling(self, _: EmptyInput) -> ProfileStatus:
+        output = self.profiler.stop()
+        return self._profile_status(output)
+
+    @expose(EmptyInput, SyncStatus)
+    def sync_titles(self, _: EmptyInput) -> SyncStatus:
+        # Pull new shows from AniList straight into the running counter's title index
+        if self._sync_thread is None or not self._sync_thread.is_alive():
+            from tools.update_anime import sync
+            self._sync_thread = threading.Thread(target=sync, args=(self.counter,), name="anime-sync", daemon=True)
+            self._sync_thread.start()
+        return self._sync_status()
+
+    @expose(EmptyInput, SyncStatus)
+    def get_sync_status(self, _: EmptyInput) -> SyncStatus:
+        return self._sync_status()
+
+    @expose(CoverRequest, CoverInfo)
+    def get_cover(self, request: CoverRequest) -> CoverInfo:
+        anime_id = request.anime_id or self._cover_id(request.name)
+        if anime_id is None or self.server_url is None:
+            return CoverInfo(anime_id=anime_id)
+        return CoverInfo(anime_id=anime_id, url=f"{self.server_url}/covers/{anime_id}")
+
+    @expose(ChatRequest, ChatStatus)
+    def connect_chat(self, request: ChatRequest) -> ChatStatus:
+        # Anonymous read-only chat: votes are counted while a poll is open
+        self._disconnect_chat()
+        chat = ChatReader(request.channel, self._on_chat_messages)
+        loop = asyncio.new_event_loop()
+
+        def run():
+            loop.run_until_complete(chat.run())
+            loop.close()
+
+        threading.Thread(target=run, name="chat", daemon=True).start()
+        self._chat, self._chat_loop = chat, loop
+        return self._chat_status()
+
+    @expose(EmptyInput, ChatStatus)
+    def disconnect_chat(self, _: EmptyInput) -> ChatStatus:
+        self._disconnect_chat()
+        return self._chat_status()
+
+    @expose(EmptyInput, ChatStatus)
+    def get_chat_status(self, _: EmptyInput) -> ChatStatus:
+        return self._chat_status()
+
+    def _disconnect_chat(self):
+        if self._chat is not None and self._chat_loop is not None:
+            asyncio.run_coroutine_threadsafe(self._chat.stop(), self._chat_loop)
+        self._chat = self._chat_loop = None
+
+    def _on_chat_messages(self, messages: List[Tuple[str, str]]):
+        # one read from the socket: the messages arrived together
+        at = time.monotonic()
+        # a scheduled poll counts from its deadline, even if it is not opened yet
+        if self.poll_id is not None or self.counter.next_window is not None:
+            self.counter.vote_batch((user, text, at) for user, text in messages)
+
+    def _chat_status(self) -> ChatStatus:
+        if self._chat is None:
+            return ChatStatus()
+        return ChatStatus(channel=self._chat.channel, connected=self._chat.connected.is_set())
+
+    @expose(EmptyInput, CacheStats)
+    def get_cache_stats(self, _: EmptyInput) -> CacheStats:
+        cache = self.counter.resolved
+        return CacheStats(size=len(cache), hits=cache.hits, misses=cache.misses, hit_rate=cache.hit_rate)
+
+    @expose(ResultsQuery, VoteResults)
+    def get_results(self, query: ResultsQuery) -> VoteResults:
+        results = self._get_sorted_votes()
+        if query.known_version == results.version:
+            return VoteResults(results=[], exact=results.exact, version=results.version, changed=False)
+        return results
+
     @expose(VoteRequest, VoteResults)
     def receive_vote(self, vote_data: VoteRequest) -> VoteResults:
-        username = vote_data.user
-        show_id = vote_data.show_id
+        self.counter.vote(vote_data.user, vote_data.show_id, time.monotonic())
+        return self._get_sorted_votes()
 
-        if self.config.vote_mode:
-            if username not in self.user_votes:
-                self.user_votes[username] = set()
-            if show_id in self.user_votes[username]:
-                return self._get_sorted_votes()
-            self.user_votes[username].add(show_id)
+    def _sync_status(self) -> SyncStatus:
+        running = self._sync_thread is not None and self._sync_thread.is_alive()
+        return SyncStatus(running=running, titles=len(self.counter.valid_titles))
 
-        self.votes[show_id] = self.votes.get(show_id, 0) + 1
-        return self._get_sorted_votes()
+    def _profile_status(self, output: Optional[str] = None) -> ProfileStatus:
+        running, poll_id, samples = self.profiler.status()
+        return ProfileStatus(running=running, poll_id=poll_id, samples=samples, output=output)
+
+    def _prefetch_covers(self, snapshot: Snapshot):
+        top = snapshot.anime_ids[:self.counter.top_n]
+        self.covers.prefetch(anime_id for anime_id in top if anime_id is not None)
+
+    def _cover_id(self, name: str) -> Optional[int]:
+        """The show a ranking name belongs to: the live ranking first, then the alias index."""
+        snapshot = self.counter.snapshot()
+        for (entry, _), anime_id in zip(snapshot.ranking, snapshot.anime_ids):
+            if entry == name:
+                return anime_id
+        return self.counter.alias_ids.get(name.strip().lower())
+
+    @staticmethod
+    def _results_for(snapshot: Snapshot) -> VoteResults:
+        return VoteResults(
+            results=[
+                VoteEntry(
+                    name=name,
+                    count=count,
+                    anime_id=snapshot.anime_ids[i],
+                    error=snapshot.errors[i] if snapshot.errors else 0,
+                )
+                for i, (name, count) in enumerate(snapshot.ranking)
+            ],
+            exact=snapshot.exact,
+            version=snapshot.version,
+        )
 
     def _get_sorted_votes(self) -> VoteResults:
-        sorted_list = list(self.votes.items())
-        n = len(sorted_list)
-        for i in range(n):
-            for j in range(0, n - i - 1):
-                if sorted_list[j][1] < sorted_list[j + 1][1]:
-                    sorted_list[j], sorted_list[j + 1] = sorted_list[j + 1], sorted_list[j]
-        return VoteResults(results=[VoteEntry(name=k, count=v) for k, v in sorted_list])
+        # Built once per published snapshot and shared by every reader
+        snapshot = self.counter.snapshot()
+        results = self._results
+        if results.version != snapshot.version:
+            results = self._results_for(snapshot)
+            self._results = results
+        return results
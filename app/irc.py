@@ -0,0 +1,134 @@
+# irc.py
+
+import asyncio
+import random
+from typing import Awaitable, Callable, List, Tuple
+
+TWITCH_IRC_HOST = "irc.chat.twitch.tv"
+TWITCH_IRC_PORT = 6667
+READ_SIZE = 64 * 1024
+
+MessageHandler = Callable[[List[Tuple[str, str]]], Awaitable[None] | None]
+
+
+def parse_privmsg(line: bytes) -> Tuple[str, str] | None:
+    """
+    Pull (username, text) out of a raw IRC line, or None if it isn't a PRIVMSG.
+    Only slices the bytes it needs: `:nick!user@host PRIVMSG #chan :text`.
+    Tags (`@...`) are skipped since we don't request them.
+    """
+    if line.startswith(b"@"):
+        space = line.find(b" ")
+        if space < 0:
+            return None
+        line = line[space + 1:]
+    if not line.startswith(b":"):
+        return None
+    prefix_end = line.find(b" ")
+    if prefix_end < 0 or line[prefix_end + 1:prefix_end + 9] != b"PRIVMSG ":
+        return None
+    text_start = line.find(b" :", prefix_end + 9)
+    if text_start < 0:
+        return None
+    bang = line.find(b"!", 1, prefix_end)
+    nick = line[1:bang if bang > 0 else prefix_end]
+    text = line[text_start + 2:]
+    if text.endswith(b"\r"):
+        text = text[:-1]
+    return nick.decode("utf-8", "replace"), text.decode("utf-8", "replace")
+
+
+class ChatReader:
+    """
+    Minimal anonymous, read-only Twitch chat client. Joins as `justinfanNNNN`,
+    which needs no OAuth, answers PINGs and reconnects with backoff. Each chat
+    line is reduced to (username, text); every read from the socket hands all
+    the messages it completed to `on_messages` as one list, so a busy chat is
+    counted in batches rather than one call per line. Twitch PINGs every few
+    minutes, so a connection silent for `read_timeout` is presumed dead.
+    """
+
+    def __init__(
+        self,
+        channel: str,
+        on_messages: MessageHandler,
+        host: str = TWITCH_IRC_HOST,
+        port: int = TWITCH_IRC_PORT,
+        max_backoff: float = 30.0,
+        read_timeout: float = 360.0,
+    ):
+        self.channel = channel.lstrip("#").lower()
+        self.on_messages = on_messages
+        self.host = host
+        self.port = port
+        self.max_backoff = max_backoff
+        self.read_timeout = read_timeout
+        self.connected = asyncio.Event()
+        self._stopping = False
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def run(self):
+        """Read chat until `stop()` is called, reconnecting on any connection loss."""
+        backoff = 1.0
+        while not self._stopping:
+            try:
+                await self._session()
+                backoff = 1.0
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+                print(f"Chat connection lost: {e!r}")
+            self.connected.clear()
+            if self._stopping:
+                break
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def stop(self):
+        self._stopping = True
+        if self._writer is not None:
+            self._writer.close()
+
+    async def _session(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        self._writer = writer
+        nick = f"justinfan{random.randint(10000, 99999)}"
+        writer.write(f"NICK {nick}\r\nJOIN #{self.channel}\r\n".encode())
+        await writer.drain()
+        self.connected.set()
+
+        pending = b""
+        try:
+            while not self._stopping:
+                data = await asyncio.wait_for(reader.read(READ_SIZE), self.read_timeout)
+                if not data:
+                    return
+                *lines, pending = (pending + data).split(b"\n")
+                batch = []
+                reconnect = False
+                for line in lines:
+                    if line.startswith(b"PING"):
+                        writer.write(b"PONG" + line[4:] + b"\n")
+                        continue
+                    if line.startswith(b":tmi.twitch.tv RECONNECT"):
+                        reconnect = True
+                        break
+                    parsed = parse_privmsg(line)
+                    if parsed is not None:
+                        batch.append(parsed)
+                if batch:
+                    await self._dispatch(batch)
+                if reconnect:
+                    return
+                await writer.drain()
+        finally:
+            self.connected.clear()
+            self._writer = None
+            writer.close()
+
+    async def _dispatch(self, batch: List[Tuple[str, str]]):
+        # a failing handler must not take the reader down with it
+        try:
+            result = self.on_messages(batch)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            print(f"Chat message handler failed: {e!r}")
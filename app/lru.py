@@ -0,0 +1,60 @@
+# lru.py
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used map with hit/miss counters. `tag` identifies
+    what the cached values were computed against; `validate` drops everything
+    when it changes.
+    """
+
+    MISSING = object()
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.tag: Hashable = None
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def validate(self, tag: Hashable):
+        if tag != self.tag:
+            with self._lock:
+                self._data.clear()
+                self.tag = tag
+
+    def get(self, key: Hashable) -> Any:
+        """Cached value, or LRUCache.MISSING."""
+        with self._lock:
+            value = self._data.get(key, self.MISSING)
+            if value is self.MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -1,6 +1,6 @@
 import os
 import socket
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.staticfiles import StaticFiles
 import webview as pywebview
 import threading
@@ -14,31 +14,58 @@ def get_free_port() -> int:
         s.bind(('localhost', 0))
         return s.getsockname()[1]
 
-def start(client: str | None = None, debug: bool = False):
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/covers/{anime_id}")
+    def cover(anime_id: int):
+        image = js_api.covers.get(anime_id)
+        if image is None:
+            raise HTTPException(status_code=404)
+        data, content_type = image
+        return Response(content=data, media_type=content_type, headers={"Cache-Control": "public, max-age=86400"})
+
+    return app
+
+def run_server(app: FastAPI) -> int:
+    port = get_free_port()
+
+    def serve(port: int):
+        import uvicorn
+        uvicorn.run(app, host="127.0.0.1", port=port)
+
+    thread = threading.Thread(target=serve, args=(port,), daemon=True)
+    thread.start()
+    return port
+
+def start(client: str | None = None, debug: bool = False, profile: bool = False):
     if client is None:
         client = "client/"
 
+    # Capture a profile of every poll from start_counting to end_counting
+    js_api.profiler.auto_capture = profile
+
+    # The local server always runs so covers are served from the cache, even
+    # when the UI itself comes from the Vite dev server.
+    app = create_app()
+
     if os.path.exists(client):
-        app = FastAPI()
         if os.path.isdir(client):
             mount_path = "/"
             serve_path = client
         else:
             mount_path = "/"
             serve_path = os.path.dirname(client)
+        # mounted last: "/" would otherwise shadow the API routes
         app.mount(mount_path, StaticFiles(directory=serve_path), name="static")
 
-        port = get_free_port()
-
-        def run_server(port: int):
-            import uvicorn
-            uvicorn.run(app, host="127.0.0.1", port=port)
-
-        thread = threading.Thread(target=run_server, args=(port,), daemon=True)
-        thread.start()
+        port = run_server(app)
+        js_api.server_url = f"http://127.0.0.1:{port}"
         print(f"Serving {serve_path} at http://127.0.0.1:{port}/")
         pywebview.create_window("Local Server", f"http://127.0.0.1:{port}/", js_api=js_api)
         pywebview.start(debug=debug)
     else:
+        port = run_server(app)
+        js_api.server_url = f"http://127.0.0.1:{port}"
         pywebview.create_window("Remote URL", client, js_api=js_api)
         pywebview.start(debug=debug)
@@ -6,6 +6,7 @@ import re
 import json
 import os
 import sqlite3
+from functools import lru_cache
 from twitchAPI.twitch import Twitch
 from twitchAPI.oauth import UserAuthenticator
 from twitchAPI.chat import Chat, EventData, ChatMessage
@@ -37,12 +38,8 @@ def load_show_titles():
         return set()
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    cursor.execute("SELECT title_romaji, title_english, synonyms FROM anime")
-    shows = set()
-    for row in cursor.fetchall():
-        shows.update(s.lower() for s in row[0:2] if s)
-        if row[2]:
-            shows.update(map(str.lower, map(str.strip, row[2].split(','))))
+    cursor.execute("SELECT alias_norm FROM anime_alias")
+    shows = {row[0] for row in cursor}
     conn.close()
     return shows
 
@@ -75,14 +72,19 @@ async def on_ready(ready_event: EventData):
     await ready_event.chat.join_room(TARGET_CHANNEL)
     print('✅ Bot has joined the channel!')
 
+@lru_cache(maxsize=4096)
+def normalize_message(text: str) -> str:
+    # chat repeats the same few strings constantly, so only run the regexes once per string
+    text = re.sub(r'[^a-z0-9\s]', '', text.lower())
+    return re.sub(r'\s+', ' ', text).strip()
+
 async def list_message(msg: ChatMessage):
     global Suggestion_list, Counts_list, user_votes, listening, mode, vote_mode_enabled
     if not listening:
         return
 
     username = msg.user.name
-    text = re.sub(r'[^a-z0-9\s]', '', msg.text.lower())
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = normalize_message(msg.text)
 
     if vote_mode_enabled:
         if username not in user_votes:
@@ -0,0 +1,121 @@
+# matcher.py
+
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+_WORD = re.compile(r"[^\W_]+")
+
+# One-word titles shorter than this ("I", "Go", ...) only count when they are
+# the whole message, otherwise ordinary chat words would be read as votes.
+MIN_EMBEDDED_WORD = 4
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased runs of letters/digits; punctuation and spacing are ignored."""
+    return _WORD.findall(text.lower())
+
+
+class TitleMatcher:
+    """
+    Aho-Corasick automaton over the words of every known title, so all title
+    mentions in a chat message are found in a single pass over its words,
+    independent of how many titles there are. Matching on whole words means
+    "one piece" is never found inside "someone pieces".
+
+    The automaton is built once in the constructor and never changes after
+    that, so `find` never pays for a rebuild; new titles mean a new matcher.
+    """
+
+    def __init__(self, titles: Iterable[str] = ()):
+        self._token_ids: Dict[str, int] = {}
+        self._goto: List[Dict[int, int]] = [{}]
+        self._depth: List[int] = [0]
+        self._key: List[str | None] = [None]  # vote key ending at this node
+        self._fail: List[int] = [0]
+        self._dict_link: List[int] = [0]  # nearest proper suffix node with a key
+        self._insert(sorted(titles))
+        self._build()
+
+    def __len__(self) -> int:
+        return sum(key is not None for key in self._key)
+
+    def _insert(self, titles: Iterable[str]):
+        for title in titles:
+            tokens = tokenize(title)
+            if not tokens:
+                continue
+            node = 0
+            for token in tokens:
+                token_id = self._token_ids.setdefault(token, len(self._token_ids))
+                child = self._goto[node].get(token_id)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][token_id] = child
+                    self._goto.append({})
+                    self._depth.append(self._depth[node] + 1)
+                    self._key.append(None)
+                node = child
+            # first spelling wins, e.g. "re:zero" and "re zero" share a node
+            if self._key[node] is None:
+                self._key[node] = title
+
+    def _build(self):
+        goto, key = self._goto, self._key
+        fail = [0] * len(goto)
+        dict_link = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token_id, child in goto[node].items():
+                state = fail[node]
+                while state and token_id not in goto[state]:
+                    state = fail[state]
+                target = goto[state].get(token_id, 0)
+                fail[child] = target if target != child else 0
+                dict_link[child] = fail[child] if key[fail[child]] is not None else dict_link[fail[child]]
+                queue.append(child)
+        self._fail, self._dict_link = fail, dict_link
+
+    def find_all(self, tokens: List[str]) -> List[Tuple[int, int, str]]:
+        """Every (start word, end word, vote key) match, overlaps included."""
+        goto, fail, key, depth, dict_link = self._goto, self._fail, self._key, self._depth, self._dict_link
+        token_ids = self._token_ids
+
+        matches = []
+        state = 0
+        for i, token in enumerate(tokens):
+            token_id = token_ids.get(token)
+            if token_id is None:
+                state = 0
+                continue
+            while state and token_id not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token_id, 0)
+            node = state if key[state] is not None else dict_link[state]
+            while node:
+                matches.append((i - depth[node] + 1, i + 1, key[node]))
+                node = dict_link[node]
+        return matches
+
+    def find(self, message: str) -> List[str]:
+        """
+        Distinct titles mentioned in `message`, in order of appearance.
+        Overlapping matches resolve to the longest title.
+        """
+        tokens = tokenize(message)
+        taken: set[int] = set()
+        chosen = []
+        for start, end, key in sorted(self.find_all(tokens), key=lambda m: (m[0] - m[1], m[0])):
+            if end - start == 1 < len(tokens) and len(tokens[start]) < MIN_EMBEDDED_WORD:
+                continue
+            words = range(start, end)
+            if taken.isdisjoint(words):
+                taken.update(words)
+                chosen.append((start, key))
+
+        found = []
+        for _, key in sorted(chosen):
+            if key not in found:
+                found.append(key)
+        return found
@@ -0,0 +1,89 @@
+# profiling.py
+
+import os
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Tuple
+
+PROFILE_DIR = "profiles"
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every running thread at a fixed interval and writes
+    them in the folded-stack format understood by flamegraph.pl / speedscope.
+
+    Nothing is hooked into the interpreter: while no capture is running there
+    is no sampler thread and no trace function, so idle overhead is zero.
+    """
+
+    def __init__(self, interval: float = 0.005, out_dir: str = PROFILE_DIR):
+        self.interval = interval
+        self.out_dir = out_dir
+        self.auto_capture = False  # start/stop with every poll
+        self.poll_id: str | None = None
+        self.started_at: datetime | None = None
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, poll_id: str) -> bool:
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self.poll_id = poll_id
+            self.started_at = datetime.utcnow()
+            self._stacks = Counter()
+            self._samples = 0
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> str | None:
+        """Stop the capture and return the path of the written profile."""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return None
+            self._stop.set()
+            thread.join()
+            self._thread = None
+            return self._write()
+
+    def status(self) -> Tuple[bool, str | None, int]:
+        return self.running, self.poll_id, self._samples
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names: Dict[int, str] = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self._stacks[";".join(reversed(stack))] += 1
+            self._samples += 1
+
+    def _write(self) -> str:
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = (self.started_at or datetime.utcnow()).strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.out_dir, f"poll-{self.poll_id}-{stamp}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        print(f"Wrote {self._samples} samples to {path}")
+        return path
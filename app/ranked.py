@@ -0,0 +1,85 @@
+# ranked.py
+
+from typing import Dict, List, Tuple
+
+
+class RankedCounter:
+    """
+    Vote counts kept permanently in rank order, so the ranking never has to be
+    sorted. Keys sit in one array ordered by count, and every count owns a
+    contiguous block of it. Moving a key up or down by one vote is a swap with
+    the edge of its block (O(1)), and the top N is the first N entries.
+
+    Within equal counts, the key that reached the count first ranks first.
+    """
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        self._keys: List[str] = []  # rank order, highest count first
+        self._pos: Dict[str, int] = {}
+        self._first: Dict[int, int] = {}  # count -> first index of its block
+        self._last: Dict[int, int] = {}  # count -> last index of its block
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def clear(self):
+        # in place: VoteCounter.votes aliases self.counts
+        self.counts.clear()
+        self._keys.clear()
+        self._pos.clear()
+        self._first.clear()
+        self._last.clear()
+
+    def _swap(self, i: int, j: int):
+        if i != j:
+            keys = self._keys
+            keys[i], keys[j] = keys[j], keys[i]
+            self._pos[keys[i]] = i
+            self._pos[keys[j]] = j
+
+    def _leave(self, count: int, index: int):
+        """`index`, at one end of the block for `count`, no longer belongs to it."""
+        first, last = self._first[count], self._last[count]
+        if first == last:
+            del self._first[count], self._last[count]
+        elif index == first:
+            self._first[count] = first + 1
+        else:
+            self._last[count] = last - 1
+
+    def increment(self, key: str):
+        count = self.counts.get(key, 0)
+        if count == 0:
+            index = len(self._keys)
+            self._keys.append(key)
+            self._pos[key] = index
+        else:
+            # to the front of its block, which borders the block above
+            index = self._first[count]
+            self._swap(self._pos[key], index)
+            self._leave(count, index)
+        self.counts[key] = count + 1
+        self._last[count + 1] = index
+        self._first.setdefault(count + 1, index)
+
+    def decrement(self, key: str):
+        count = self.counts.get(key, 0)
+        if count == 0:
+            return
+        # to the back of its block, which borders the block below
+        index = self._last[count]
+        self._swap(self._pos[key], index)
+        self._leave(count, index)
+        if count == 1:
+            # the lowest block, so `index` is the tail
+            self._keys.pop()
+            del self._pos[key], self.counts[key]
+            return
+        self.counts[key] = count - 1
+        self._first[count - 1] = index
+        self._last.setdefault(count - 1, index)
+
+    def top(self, n: int | None = None) -> List[Tuple[str, int]]:
+        keys = self._keys if n is None else self._keys[:n]
+        return [(key, self.counts[key]) for key in keys]
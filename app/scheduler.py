@@ -0,0 +1,99 @@
+# scheduler.py
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, List, Tuple
+from uuid import uuid4
+
+
+@dataclass
+class ScheduledPoll:
+    poll_id: str
+    opens_at: float  # time.monotonic() deadlines
+    closes_at: float
+
+    @property
+    def duration(self) -> float:
+        return self.closes_at - self.opens_at
+
+
+class PollScheduler:
+    """
+    Opens and closes queued polls at exact monotonic deadlines on its own
+    thread. Deadlines are fixed when a poll is queued, so a late wake-up never
+    stretches a poll: votes are judged by their own timestamp against
+    `closes_at`, not by when the close callback happens to run.
+    """
+
+    def __init__(
+        self,
+        on_open: Callable[[ScheduledPoll], None],
+        on_close: Callable[[ScheduledPoll], None],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.on_open = on_open
+        self.on_close = on_close
+        self.clock = clock
+        self.active: ScheduledPoll | None = None
+        self._queue: Deque[ScheduledPoll] = deque()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def schedule(self, duration: float, delay: float = 0.0) -> ScheduledPoll:
+        """Queue a poll `delay` seconds after the previous one ends (or from now)."""
+        if duration <= 0:
+            raise ValueError("duration must be positive")
+        with self._cond:
+            now = self.clock()
+            last = self._queue[-1] if self._queue else self.active
+            anchor = max(now, last.closes_at) if last else now
+            poll = ScheduledPoll(uuid4().hex[:8], anchor + delay, anchor + delay + duration)
+            self._queue.append(poll)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="poll-scheduler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+            return poll
+
+    def cancel_pending(self) -> int:
+        """Drop queued polls that have not opened yet; the active one keeps running."""
+        with self._cond:
+            dropped = len(self._queue)
+            self._queue.clear()
+            self._cond.notify()
+            return dropped
+
+    def pending(self) -> List[ScheduledPoll]:
+        with self._cond:
+            return list(self._queue)
+
+    def _next_event(self) -> Tuple[Callable[[ScheduledPoll], None], ScheduledPoll] | None:
+        """Pop the due transition, or wait until the next deadline. Holds `_cond`."""
+        now = self.clock()
+        if self.active is not None:
+            if now >= self.active.closes_at:
+                poll, self.active = self.active, None
+                return self.on_close, poll
+            self._cond.wait(self.active.closes_at - now)
+        elif self._queue:
+            if now >= self._queue[0].opens_at:
+                self.active = self._queue.popleft()
+                return self.on_open, self.active
+            self._cond.wait(self._queue[0].opens_at - now)
+        else:
+            self._cond.wait()
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                event = self._next_event()
+            if event is not None:
+                # callbacks run unlocked so they may schedule follow-up polls
+                callback, poll = event
+                try:
+                    callback(poll)
+                except Exception as e:
+                    print(f"Poll scheduler callback failed: {e}")
@@ -0,0 +1,160 @@
+# shm.py
+"""
+Live ranking in shared memory for local helper processes (OBS scripts, bots).
+
+Layout (little endian), fixed so readers need nothing but this module:
+
+    header  magic "GOTR" | layout u16 | capacity u16 | name size u16 | pad u16
+            seq u64 | version u64 | count u32 | writer pid u32
+    entry   count u64 | name length u16 | name utf-8 (name size bytes)
+
+`seq` is a seqlock: odd while the writer is mid-update. Readers copy the
+segment and retry if `seq` was odd or changed underneath them. The writer's
+pid tells a segment left behind by a crash from one another instance owns.
+
+    from app.shm import RankingReader
+    with RankingReader() as reader:
+        version, ranking = reader.read()
+"""
+
+import os
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+from typing import List, Tuple
+
+SEGMENT_NAME = "got_counter_ranking"
+MAGIC = b"GOTR"
+LAYOUT = 1
+
+_HEADER = struct.Struct("<4sHHHHQQII")
+_SEQ_OFFSET = 12
+_ENTRY = struct.Struct("<QH")
+_PID_OFFSET = 32
+
+
+def segment_size(capacity: int, name_size: int) -> int:
+    return _HEADER.size + capacity * (_ENTRY.size + name_size)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        # Before 3.13 attaching registers the segment with this process's
+        # resource tracker, which would unlink it when the reader exits.
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+def _alive(pid: int) -> bool:
+    if not pid:
+        return False
+    if sys.platform == "win32":
+        # Windows frees a segment with its last handle: an existing one has a live owner
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RankingWriter:
+    """Owns the segment and writes every published snapshot's top entries into it."""
+
+    def __init__(self, name: str = SEGMENT_NAME, capacity: int = 50, name_size: int = 128):
+        self.capacity = capacity
+        self.name_size = name_size
+        size = segment_size(capacity, name_size)
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            existing = _attach(name)
+            owner = 0
+            if len(existing.buf) >= _HEADER.size and bytes(existing.buf[:4]) == MAGIC:
+                owner = struct.unpack_from("<I", existing.buf, _PID_OFFSET)[0]
+            existing.close()
+            if _alive(owner):
+                raise FileExistsError(f"{name} is in use by process {owner}")
+            # left behind by a crashed run
+            existing.unlink()
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self._seq = 0
+        self._pid = os.getpid()
+        _HEADER.pack_into(self._shm.buf, 0, MAGIC, LAYOUT, capacity, name_size, 0, 0, 0, 0, self._pid)
+
+    def write(self, version: int, ranking: List[Tuple[str, int]] | Tuple[Tuple[str, int], ...]):
+        buf = self._shm.buf
+        entries = ranking[:self.capacity]
+        self._seq += 1  # odd: update in progress
+        struct.pack_into("<Q", buf, _SEQ_OFFSET, self._seq)
+
+        offset = _HEADER.size
+        for name, count in entries:
+            encoded = name.encode("utf-8")[:self.name_size].decode("utf-8", "ignore").encode("utf-8")
+            _ENTRY.pack_into(buf, offset, count, len(encoded))
+            offset += _ENTRY.size
+            buf[offset:offset + len(encoded)] = encoded
+            offset += self.name_size
+
+        self._seq += 1
+        _HEADER.pack_into(buf, 0, MAGIC, LAYOUT, self.capacity, self.name_size, 0, self._seq, version, len(entries), self._pid)
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+
+class RankingReader:
+    """Attach to a running counter's segment and read consistent copies of the ranking."""
+
+    def __init__(self, name: str = SEGMENT_NAME):
+        self._shm = _attach(name)
+        magic, layout, self.capacity, self.name_size = _HEADER.unpack_from(self._shm.buf, 0)[:4]
+        if magic != MAGIC or layout != LAYOUT:
+            self._shm.close()
+            raise ValueError(f"{name} is not a GOT counter ranking (layout {layout})")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def read(self, timeout: float = 0.1) -> Tuple[int, List[Tuple[str, int]]]:
+        """Return (snapshot version, [(name, count), ...]) from one consistent update."""
+        buf = self._shm.buf
+        deadline = time.monotonic() + timeout
+        while True:
+            header = _HEADER.unpack_from(buf, 0)
+            seq = header[5]
+            if seq % 2 == 0:
+                version, count = header[6], header[7]
+                data = bytes(buf[_HEADER.size:_HEADER.size + count * (_ENTRY.size + self.name_size)])
+                if struct.unpack_from("<Q", buf, _SEQ_OFFSET)[0] == seq:
+                    break
+            if time.monotonic() > deadline:
+                raise TimeoutError("ranking kept changing while reading")
+
+        ranking = []
+        stride = _ENTRY.size + self.name_size
+        for offset in range(0, len(data), stride):
+            votes, length = _ENTRY.unpack_from(data, offset)
+            start = offset + _ENTRY.size
+            ranking.append((data[start:start + length].decode("utf-8", "replace"), votes))
+        return version, ranking
+
+    def version(self) -> int:
+        """Cheap poll: the snapshot version only, to skip reads when nothing changed."""
+        return _HEADER.unpack_from(self._shm.buf, 0)[6]
+
+    def close(self):
+        self._shm.close()
@@ -0,0 +1,88 @@
+# sketch.py
+
+import heapq
+from typing import Dict, List, Tuple
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitter counter (Metwally et al.). Tracks at most
+    `capacity` keys; when a new key arrives and the table is full it replaces
+    the key with the smallest count and inherits that count as its error.
+
+    Guarantees, with N votes seen so far:
+      • every reported count overestimates the true count by at most error(key)
+      • error(key) <= N / capacity
+      • any key with true count > N / capacity is tracked
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.total = 0
+        # (count when pushed, key); counts only grow, so a stale entry is
+        # refreshed lazily when it surfaces. Exactly one entry per tracked key.
+        self._heap: List[Tuple[int, str]] = []
+
+    def clear(self):
+        # in place: VoteCounter.votes aliases self.counts
+        self.counts.clear()
+        self.errors.clear()
+        self._heap.clear()
+        self.total = 0
+
+    def _pop_min(self) -> Tuple[int, str]:
+        while True:
+            count, key = heapq.heappop(self._heap)
+            current = self.counts[key]
+            if current == count:
+                return count, key
+            heapq.heappush(self._heap, (current, key))
+
+    def add(self, key: str, n: int = 1):
+        self.total += n
+        if key in self.counts:
+            self.counts[key] += n
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[key] = n
+            self.errors[key] = 0
+        else:
+            min_count, evicted = self._pop_min()
+            del self.counts[evicted]
+            del self.errors[evicted]
+            self.counts[key] = min_count + n
+            self.errors[key] = min_count
+        heapq.heappush(self._heap, (self.counts[key], key))
+
+    def error(self, key: str) -> int:
+        return self.errors.get(key, 0)
+
+    @property
+    def max_error(self) -> int:
+        return self.total // self.capacity
+
+    def top(self, n: int | None = None) -> List[Tuple[str, int]]:
+        if n is None:
+            return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        # same order as sorted()[:n], without sorting every tracked key
+        return heapq.nlargest(n, self.counts.items(), key=lambda item: item[1])
+
+    def is_exact(self, n: int) -> bool:
+        """
+        True when the first `n` keys of `top()` are guaranteed to be the real
+        top-n in the right order: each one's lower bound (count - error) is at
+        least the upper bound of the key ranked after it.
+        """
+        ranked = self.top(n + 1)
+        for i in range(min(n, len(ranked) - 1)):
+            key, count = ranked[i]
+            if count - self.errors[key] < ranked[i + 1][1]:
+                return False
+        if len(ranked) <= n and len(self.counts) == self.capacity:
+            # table is full, so an untracked key may be hiding below
+            return all(self.errors[key] == 0 for key, _ in ranked)
+        return True
@@ -0,0 +1,89 @@
+# snapshot.py
+
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Callable, List, Tuple
+
+Ranking = Tuple[Tuple[str, int], ...]
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: int
+    ranking: Ranking
+    published_at: float = field(default_factory=time.monotonic)
+    anime_ids: Tuple[int | None, ...] = ()  # per ranking entry, the show it counts for
+    errors: Tuple[int, ...] = ()  # per ranking entry, how much its count may be overestimated
+    exact: bool = True  # whether the top N is guaranteed to match an unbounded count
+
+
+class SnapshotPublisher:
+    """
+    Read-copy-update style publication of the ranking. Writers call
+    `mark_dirty()`; at most once per `min_interval` the top `size` entries are
+    rebuilt under the writers' lock and swapped in as a new immutable Snapshot.
+    Readers just load `current`: a single reference read, no lock, no copy.
+    A trailing publish guarantees the last change shows up within one interval.
+    `build(n)` returns the snapshot contents for the top `n` (None: all of
+    them); its version is assigned here. Listeners run after the lock is
+    released, so slow ones never hold up the writers.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[int | None], Snapshot],
+        lock: threading.Lock,
+        min_interval: float = 0.05,
+        size: int | None = None,
+    ):
+        self._build = build
+        self._lock = lock  # shared with the writers, never taken by readers
+        self.min_interval = min_interval
+        self.size = size  # entries in a live snapshot, None for the whole ranking
+        self.current = Snapshot(0, ())
+        self._dirty = False
+        self._timer: threading.Timer | None = None
+        self._timer_lock = threading.Lock()
+        self._listeners: List[Callable[[Snapshot], None]] = []
+        self._notify_lock = threading.Lock()
+        self._notified = 0  # version the listeners saw last
+
+    def subscribe(self, listener: Callable[[Snapshot], None]):
+        """Call `listener` with every new snapshot, in version order."""
+        self._listeners.append(listener)
+
+    def publish(self, full: bool = False) -> Snapshot:
+        """
+        Rebuild and swap in a snapshot now, of the whole ranking if `full`.
+        Caller must not hold the writers' lock.
+        """
+        with self._lock:
+            built = self._build(None if full else self.size)
+            self._dirty = False
+            snapshot = self.current = replace(built, version=self.current.version + 1)
+        with self._notify_lock:
+            # a concurrent publish may have notified a newer snapshot already
+            if snapshot.version > self._notified:
+                self._notified = snapshot.version
+                for listener in self._listeners:
+                    listener(snapshot)
+        return snapshot
+
+    def mark_dirty(self):
+        self._dirty = True
+        wait = self.current.published_at + self.min_interval - time.monotonic()
+        if wait <= 0:
+            self.publish()
+            return
+        with self._timer_lock:
+            if self._timer is None:
+                self._timer = threading.Timer(wait, self._trailing)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _trailing(self):
+        with self._timer_lock:
+            self._timer = None
+        if self._dirty:
+            self.publish()
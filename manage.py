@@ -11,9 +11,18 @@ def check_pnpm():
 
 def main():
     parser = argparse.ArgumentParser(description="Manage the GOT Counter app.")
-    parser.add_argument("mode", choices=["dev", "prod", "generate:api"], help="Run mode")
+    parser.add_argument("mode", choices=["dev", "prod", "generate:api", "export:history"], help="Run mode")
+    parser.add_argument("--profile", action="store_true", help="Write a folded-stack profile of every poll to profiles/")
+    parser.add_argument("--out", default="history.csv", help="Export file for export:history (.csv, .json or .columns)")
+    parser.add_argument("--force", action="store_true", help="Regenerate the TS interface even if app/interface.py is unchanged")
     args = parser.parse_args()
-    
+
+    if args.mode == "export:history":
+        from app.history import HistoryStore
+        count = HistoryStore().export(args.out)
+        print(f"Exported {count} rows to {args.out}")
+        return
+
     check_pnpm()
 
     if args.mode == "dev":
@@ -22,10 +31,10 @@ def main():
         converter.convert_live()
         port, _ = start_vite()
         import app.main as main
-        main.start(f"http://localhost:{port}", debug=True)
+        main.start(f"http://localhost:{port}", debug=True, profile=args.profile)
     elif args.mode == "generate:api":
         import tools.interface.converter as converter
-        converter.convert()
+        converter.convert(force=args.force)
     elif args.mode == "prod":
         pass
 
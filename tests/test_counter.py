@@ -0,0 +1,40 @@
+import time
+
+import pytest
+
+from app.counter import VoteConfig, VoteCounter
+
+
+@pytest.fixture
+def counter(tmp_path, monkeypatch):
+    # no vote_config.json and no shows.db: an empty normal-mode counter
+    monkeypatch.chdir(tmp_path)
+    return VoteCounter()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_synced_titles_reach_the_matcher_without_a_rebuild_on_vote(counter):
+    counter.add_titles(["Frieren", None], 1)
+    counter.config = VoteConfig(mode="normal", vote_mode=False, extract=True)
+    counter.set_config()
+    counter.start_counting()
+    built = counter.matcher
+
+    counter.add_titles(["One Piece", None], 2)
+    # rebuilt off the writers' lock and swapped in, never by a vote
+    wait_for(lambda: counter.matcher is not built)
+    counter.vote("viewer", "i love one piece and frieren")
+    assert dict(counter.end_counting().ranking) == {"one piece": 1, "frieren": 1}
+
+
+def test_official_title_takes_over_a_synonym_alias(counter):
+    counter.add_titles(["Kimetsu no Yaiba", "Demon Slayer", "Hashira"], 1)
+    counter.add_titles(["Hashira", None, "Demon Slayer"], 2)
+    # the official title wins over a synonym, but not over another official title
+    assert counter.alias_ids == {"kimetsu no yaiba": 1, "demon slayer": 1, "hashira": 2}
@@ -0,0 +1,144 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.covers import CoverCache
+from tools.update_anime import init_db
+
+IMAGE = b"\xff\xd8" + b"cover" * 100  # 502 bytes
+
+
+class CDN:
+    """Stand-in for the AniList image CDN: serves /<id>.jpg with an ETag."""
+
+    def __init__(self):
+        self.requests = []  # (path, If-None-Match)
+        cdn = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                etag = f'"{self.path}"'
+                cdn.requests.append((self.path, self.headers.get("If-None-Match")))
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(IMAGE)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(IMAGE)
+
+            def log_message(self, *_):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def cdn():
+    server = CDN()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def db_path(tmp_path, cdn):
+    path = str(tmp_path / "shows.db")
+    conn = init_db(path)
+    conn.executemany(
+        "INSERT INTO anime (id, title_romaji, cover_image) VALUES (?, ?, ?)",
+        [(anime_id, f"show {anime_id}", f"{cdn.url}/{anime_id}.jpg") for anime_id in (1, 2, 3)],
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def make_cache(db_path, tmp_path, **kwargs) -> CoverCache:
+    return CoverCache(db_path, cache_dir=str(tmp_path / "covers"), **kwargs)
+
+
+def test_fetches_once_then_serves_from_memory(cdn, db_path, tmp_path):
+    cache = make_cache(db_path, tmp_path)
+    assert cache.get(1) == (IMAGE, "image/jpeg")
+    assert cache.get(1) == (IMAGE, "image/jpeg")
+    assert cdn.requests == [("/1.jpg", None)]
+    assert (tmp_path / "covers" / "1.img").read_bytes() == IMAGE
+
+
+def test_unknown_show_has_no_cover(cdn, db_path, tmp_path):
+    assert make_cache(db_path, tmp_path).get(404) is None
+    assert cdn.requests == []
+
+
+def test_revalidates_expired_copy_with_etag(cdn, db_path, tmp_path):
+    cache = make_cache(db_path, tmp_path, max_age=0)
+    cache.get(1)
+    assert cache.get(1) == (IMAGE, "image/jpeg")
+    assert cdn.requests == [("/1.jpg", None), ("/1.jpg", '"/1.jpg"')]
+
+
+def test_disk_copy_survives_restart(cdn, db_path, tmp_path):
+    make_cache(db_path, tmp_path).get(1)
+    assert make_cache(db_path, tmp_path).get(1) == (IMAGE, "image/jpeg")
+    assert len(cdn.requests) == 1
+
+
+def test_serves_stale_copy_when_cdn_is_down(cdn, db_path, tmp_path):
+    make_cache(db_path, tmp_path).get(1)
+    cdn.stop()
+    cache = make_cache(db_path, tmp_path, max_age=0)
+    assert cache.get(1) == (IMAGE, "image/jpeg")
+    assert cache.get(2) is None
+
+
+def test_evicts_least_recently_used_from_disk(cdn, db_path, tmp_path):
+    cache = make_cache(db_path, tmp_path, max_disk_bytes=2 * len(IMAGE))
+    cache.get(1)
+    cache.get(2)
+    cache.get(1)  # 2 is now the oldest
+    cache.get(3)
+    covers = tmp_path / "covers"
+    assert sorted(path.name for path in covers.glob("*.img")) == ["1.img", "3.img"]
+    assert not (covers / "2.json").exists()
+
+
+def test_evicts_least_recently_used_from_memory(cdn, db_path, tmp_path):
+    cache = make_cache(db_path, tmp_path, max_memory_bytes=2 * len(IMAGE))
+    cache.get(1)
+    cache.get(2)
+    cache.get(1)
+    cache.get(3)
+    assert list(cache._memory) == [1, 3]
+    # still on disk, so no second download
+    assert cache.get(2) == (IMAGE, "image/jpeg")
+    assert [path for path, _ in cdn.requests] == ["/1.jpg", "/2.jpg", "/3.jpg"]
+
+
+def test_prefetch_warms_cache_in_background(cdn, db_path, tmp_path):
+    cache = make_cache(db_path, tmp_path)
+    cache.prefetch([1, 2, 2])
+    cache._pool.shutdown(wait=True)
+    assert sorted(cache._memory) == [1, 2]
+    assert sorted(path for path, _ in cdn.requests) == ["/1.jpg", "/2.jpg"]
+
+
+def test_revalidation_rewrites_an_image_evicted_meanwhile(cdn, db_path, tmp_path):
+    cache = make_cache(db_path, tmp_path, max_age=0, max_disk_bytes=len(IMAGE))
+    cache.get(1)
+    cached = cache._read_disk(1)
+    cache.get(2)  # evicts 1 while its revalidation is in flight
+    assert cache._fetch(1, cached)[:2] == (IMAGE, "image/jpeg")
+    covers = tmp_path / "covers"
+    assert sorted(path.name for path in covers.iterdir()) == ["1.img", "1.json"]
+    assert cdn.requests[-1] == ("/1.jpg", '"/1.jpg"')
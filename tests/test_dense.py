@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from app.dense import DenseCounter
+
+
+@pytest.fixture
+def dense():
+    dense = DenseCounter((anime_id, f"show {anime_id}") for anime_id in range(1000))
+    dense.add_many(np.random.default_rng(0).integers(0, 1000, 5000))
+    return dense
+
+
+@pytest.mark.parametrize("n", [1, 10, 50, 999, 5000])
+def test_top_n_matches_the_head_of_a_full_sort(dense, n):
+    assert dense.top_slots(n).tolist() == dense.top_slots().tolist()[:n]
+
+
+def test_top_n_keeps_ties_in_slot_order():
+    dense = DenseCounter((anime_id, str(anime_id)) for anime_id in range(6))
+    dense.add_many([5, 5, 4, 3, 2, 1])
+    assert dense.top(3) == [("5", 2), ("1", 1), ("2", 1)]
+
+
+def test_mask_restricts_the_top_n(dense):
+    mask = np.arange(len(dense)) % 2 == 0
+    top = dense.top_slots(10, mask)
+    assert top.tolist() == dense.top_slots(None, mask).tolist()[:10]
+    assert all(slot % 2 == 0 for slot in top)
@@ -0,0 +1,218 @@
+import asyncio
+
+import pytest
+
+from app.irc import ChatReader, parse_privmsg
+
+TAGS = b"@badge-info=;color=#1E90FF;display-name=Viewer42;user-id=1 "
+PRIVMSG = b":viewer42!viewer42@viewer42.tmi.twitch.tv PRIVMSG #gotgames_tb :one piece\r\n"
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        (PRIVMSG.rstrip(b"\n"), ("viewer42", "one piece")),
+        (TAGS + PRIVMSG.rstrip(b"\r\n"), ("viewer42", "one piece")),
+        (b":nick PRIVMSG #chan :has :colons: in it", ("nick", "has :colons: in it")),
+        (":ü!ü@host PRIVMSG #chan :frieren ✨".encode(), ("ü", "frieren ✨")),
+        (b":tmi.twitch.tv 001 justinfan12345 :Welcome, GLHF!", None),
+        (TAGS + b":viewer42!viewer42@viewer42.tmi.twitch.tv JOIN #gotgames_tb", None),
+        (b"PING :tmi.twitch.tv", None),
+        (b"@tags-only", None),
+    ],
+)
+def test_parse_privmsg(line, expected):
+    assert parse_privmsg(line) == expected
+
+
+class StandInServer:
+    """Local IRC stand-in: every connection runs `script(reader, writer)` after JOIN."""
+
+    def __init__(self, *scripts):
+        self.scripts = list(scripts)
+        self.connections = 0
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *_):
+        self.server.close()
+
+    async def _handle(self, reader, writer):
+        script = self.scripts[min(self.connections, len(self.scripts) - 1)]
+        self.connections += 1
+        while not (line := await reader.readline()).startswith(b"JOIN"):
+            if not line:
+                return
+        try:
+            await script(reader, writer)
+        finally:
+            writer.close()
+
+
+def reader_for(server, on_messages, **kwargs) -> ChatReader:
+    return ChatReader("GotGames_TB", on_messages, host="127.0.0.1", port=server.port, **kwargs)
+
+
+async def wait_for(condition, timeout=5.0):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def idle(reader, writer):
+    await reader.read()
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    """Record reconnect delays instead of sleeping through them."""
+    delays = []
+    sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args):
+        if delay >= 1:
+            delays.append(delay)
+            delay = 0
+        await sleep(delay, *args)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    return delays
+
+
+def test_answers_ping_and_delivers_messages():
+    pongs = []
+
+    async def script(reader, writer):
+        writer.write(b"PING :tmi.twitch.tv\r\n")
+        pongs.append(await reader.readline())
+        writer.write(PRIVMSG * 3 + TAGS + PRIVMSG)
+        await reader.read()
+
+    async def main():
+        messages = []
+        async with StandInServer(script) as server:
+            chat = reader_for(server, messages.extend)
+            task = asyncio.create_task(chat.run())
+            await wait_for(lambda: len(messages) == 4)
+            assert chat.connected.is_set()
+            await chat.stop()
+            await task
+        return messages
+
+    assert asyncio.run(main()) == [("viewer42", "one piece")] * 4
+    assert pongs == [b"PONG :tmi.twitch.tv\r\n"]
+
+
+def test_reconnects_on_reconnect_notice(no_backoff):
+    async def reconnect(reader, writer):
+        writer.write(PRIVMSG + b":tmi.twitch.tv RECONNECT\r\n" + PRIVMSG)
+        await reader.read()
+
+    async def main():
+        messages = []
+        async with StandInServer(reconnect, idle) as server:
+            chat = reader_for(server, messages.extend)
+            task = asyncio.create_task(chat.run())
+            await wait_for(lambda: server.connections == 2 and chat.connected.is_set())
+            await chat.stop()
+            await task
+        return messages
+
+    # the message queued before RECONNECT is kept, the one after it dropped
+    assert asyncio.run(main()) == [("viewer42", "one piece")]
+
+
+def test_backoff_doubles_up_to_the_cap(no_backoff):
+    async def main():
+        async with StandInServer(idle) as server:
+            port = server.port
+        # nothing listens on `port` any more: every attempt is refused
+        chat = ChatReader("gotgames_tb", lambda batch: None, host="127.0.0.1", port=port, max_backoff=8)
+        task = asyncio.create_task(chat.run())
+        await wait_for(lambda: len(no_backoff) >= 6)
+        await chat.stop()
+        await task
+        assert not chat.connected.is_set()
+
+    asyncio.run(main())
+    assert no_backoff[:6] == [1, 2, 4, 8, 8, 8]
+
+
+def test_clean_disconnect_resets_backoff(no_backoff):
+    async def hang_up(reader, writer):
+        pass
+
+    async def main():
+        async with StandInServer(hang_up, hang_up, idle) as server:
+            chat = reader_for(server, lambda batch: None)
+            task = asyncio.create_task(chat.run())
+            await wait_for(lambda: server.connections == 3 and chat.connected.is_set())
+            await chat.stop()
+            await task
+
+    asyncio.run(main())
+    assert no_backoff == [1, 1]
+
+
+def test_connected_clears_when_server_hangs_up():
+    async def hang_up_later(reader, writer):
+        writer.write(PRIVMSG)
+        await asyncio.sleep(0.1)
+
+    async def main():
+        messages = []
+        async with StandInServer(hang_up_later) as server:
+            chat = reader_for(server, messages.extend)
+            task = asyncio.create_task(chat.run())
+            await wait_for(lambda: messages)
+            assert chat.connected.is_set()
+            # cleared while backing off before the next attempt
+            await wait_for(lambda: not chat.connected.is_set(), timeout=0.5)
+            await chat.stop()
+            task.cancel()
+
+    asyncio.run(main())
+
+
+def test_handler_errors_do_not_stop_the_reader():
+    async def two_reads(reader, writer):
+        writer.write(PRIVMSG)
+        await writer.drain()
+        await asyncio.sleep(0.1)
+        writer.write(PRIVMSG)
+        await reader.read()
+
+    async def main():
+        calls = []
+
+        def on_messages(batch):
+            calls.append(batch)
+            if len(calls) == 1:
+                raise RuntimeError("handler bug")
+
+        async with StandInServer(two_reads) as server:
+            chat = reader_for(server, on_messages)
+            task = asyncio.create_task(chat.run())
+            await wait_for(lambda: len(calls) == 2)
+            assert chat.connected.is_set()
+            assert server.connections == 1
+            await chat.stop()
+            await task
+
+    asyncio.run(main())
+
+
+def test_silent_connection_is_dropped_after_read_timeout(no_backoff):
+    async def main():
+        async with StandInServer(idle) as server:
+            chat = reader_for(server, lambda batch: None, read_timeout=0.2)
+            task = asyncio.create_task(chat.run())
+            await wait_for(lambda: server.connections == 2)
+            await chat.stop()
+            await task
+
+    asyncio.run(main())
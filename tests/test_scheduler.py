@@ -0,0 +1,149 @@
+import threading
+import time
+
+import pytest
+
+from app.counter import VoteCounter
+from app.scheduler import PollScheduler
+
+
+class FakeClock:
+    def __init__(self, now: float = 100.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+        self._cond = threading.Condition()
+
+    def on(self, kind):
+        def callback(poll):
+            with self._cond:
+                self.events.append((kind, poll.poll_id))
+                self._cond.notify_all()
+        return callback
+
+    def wait_for(self, count, timeout=5.0):
+        with self._cond:
+            assert self._cond.wait_for(lambda: len(self.events) >= count, timeout)
+        return self.events
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+
+@pytest.fixture
+def scheduler(clock, recorder):
+    return PollScheduler(recorder.on("open"), recorder.on("close"), clock=clock)
+
+
+def advance(scheduler, clock, seconds):
+    # wake the scheduler thread so it re-reads the fake clock
+    with scheduler._cond:
+        clock.now += seconds
+        scheduler._cond.notify()
+
+
+def test_queued_polls_get_back_to_back_deadlines(scheduler):
+    first = scheduler.schedule(10)
+    second = scheduler.schedule(5, delay=2)
+    assert (first.opens_at, first.closes_at) == (100, 110)
+    assert (second.opens_at, second.closes_at) == (112, 117)
+
+
+def test_polls_open_and_close_at_their_deadlines(scheduler, clock, recorder):
+    first = scheduler.schedule(10)
+    second = scheduler.schedule(5, delay=2)
+    assert recorder.wait_for(1) == [("open", first.poll_id)]
+
+    advance(scheduler, clock, 9.9)
+    time.sleep(0.05)
+    assert len(recorder.events) == 1
+    advance(scheduler, clock, 0.1)
+    assert recorder.wait_for(2)[-1] == ("close", first.poll_id)
+
+    advance(scheduler, clock, 2)
+    assert recorder.wait_for(3)[-1] == ("open", second.poll_id)
+    assert scheduler.active is second and scheduler.pending() == []
+
+
+def test_late_wake_up_keeps_the_deadlines(scheduler, clock, recorder):
+    poll = scheduler.schedule(10)
+    recorder.wait_for(1)
+    advance(scheduler, clock, 25)
+    recorder.wait_for(2)
+    # the close callback may run late, the window it reports does not move
+    assert (poll.opens_at, poll.closes_at) == (100, 110)
+
+
+def test_cancel_pending_keeps_the_active_poll(scheduler, clock, recorder):
+    active = scheduler.schedule(10)
+    recorder.wait_for(1)
+    scheduler.schedule(10)
+    assert scheduler.cancel_pending() == 1
+    advance(scheduler, clock, 10)
+    assert recorder.wait_for(2) == [("open", active.poll_id), ("close", active.poll_id)]
+    assert scheduler.pending() == []
+
+
+@pytest.fixture
+def counter(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return VoteCounter()
+
+
+@pytest.fixture
+def base():
+    # a poll window that has already closed on the real clock
+    return time.monotonic() - 60
+
+
+def test_votes_are_judged_by_their_own_stamp(counter, base):
+    counter.start_counting(base, base + 10)
+    for user, at in (("early", base - 0.01), ("first", base), ("last", base + 9.99), ("late", base + 10)):
+        counter.vote(user, user, at)
+    assert dict(counter.end_counting().ranking) == {"first": 1, "last": 1}
+
+
+def test_batched_votes_are_judged_one_by_one(counter, base):
+    counter.start_counting(base, base + 10)
+    counter.vote_batch([("a", "in", base + 5), ("b", "out", base + 10), ("c", "in", base + 9.5)])
+    assert counter.end_counting().ranking == (("in", 2),)
+
+
+def test_votes_for_the_next_poll_are_held_until_it_opens(counter, base):
+    counter.start_counting(base, base + 10)
+    counter.expect((base + 20, base + 30))
+    counter.vote("now", "current", base + 5)
+    counter.vote_batch([("gap", "between", base + 15), ("next", "upcoming", base + 20)])
+    counter.vote("after", "too late", base + 30)
+    assert counter.end_counting().ranking == (("current", 1),)
+
+    counter.start_counting(base + 20, base + 30)
+    assert counter.next_window is None
+    assert counter.end_counting().ranking == (("upcoming", 1),)
+
+
+def test_cancelling_the_next_poll_drops_its_held_votes(counter, base):
+    counter.expect((base + 20, base + 30))
+    counter.vote("next", "upcoming", base + 25)
+    counter.expect(None)
+    counter.start_counting(base + 20, base + 30)
+    assert counter.end_counting().ranking == ()
+
+
+def test_history_times_come_from_the_window(counter, base):
+    counter.start_counting(base, base + 10)
+    counter.end_counting()
+    assert (counter.ended_at - counter.started_at).total_seconds() == pytest.approx(10)
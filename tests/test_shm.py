@@ -0,0 +1,54 @@
+import struct
+import subprocess
+import sys
+import uuid
+
+import pytest
+
+from app.shm import _PID_OFFSET, RankingReader, RankingWriter
+
+
+@pytest.fixture
+def name():
+    return f"got_test_{uuid.uuid4().hex[:8]}"
+
+
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_reader_sees_the_written_ranking(name):
+    writer = RankingWriter(name, capacity=2)
+    try:
+        writer.write(7, [("frieren", 3), ("one piece", 2), ("bleach", 1)])
+        with RankingReader(name) as reader:
+            assert reader.read() == (7, [("frieren", 3), ("one piece", 2)])
+    finally:
+        writer.close()
+
+
+def test_second_instance_does_not_take_over_a_live_segment(name):
+    writer = RankingWriter(name)
+    try:
+        writer.write(1, [("frieren", 1)])
+        with pytest.raises(OSError):
+            RankingWriter(name)
+        with RankingReader(name) as reader:
+            assert reader.read() == (1, [("frieren", 1)])
+    finally:
+        writer.close()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Windows frees segments with their last handle")
+def test_segment_left_by_a_dead_process_is_replaced(name):
+    crashed = RankingWriter(name)
+    struct.pack_into("<I", crashed._shm.buf, _PID_OFFSET, dead_pid())
+    crashed._shm.close()  # as if the process died: no unlink
+    writer = RankingWriter(name, capacity=3)
+    try:
+        with RankingReader(name) as reader:
+            assert reader.capacity == 3
+    finally:
+        writer.close()
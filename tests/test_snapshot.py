@@ -0,0 +1,41 @@
+import threading
+
+import pytest
+
+from app.counter import VoteCounter
+from app.snapshot import Snapshot, SnapshotPublisher
+
+
+@pytest.fixture
+def counter(tmp_path, monkeypatch):
+    # no vote_config.json and no shows.db: a fresh normal-mode counter
+    monkeypatch.chdir(tmp_path)
+    counter = VoteCounter()
+    counter.start_counting()
+    return counter
+
+
+def test_live_snapshots_hold_the_top_n_only(counter):
+    counter.snapshots.size = 3
+    for user, show in enumerate("abcdeabca"):
+        counter.vote(str(user), show)
+    assert counter.snapshots.publish().ranking == (("a", 3), ("b", 2), ("c", 2))
+
+
+def test_end_counting_publishes_the_full_ranking(counter):
+    counter.snapshots.size = 2
+    for user, show in enumerate("abcab"):
+        counter.vote(str(user), show)
+    final = counter.end_counting()
+    assert final.ranking == (("a", 2), ("b", 2), ("c", 1))
+    assert counter.snapshot() is final
+
+
+def test_listeners_run_outside_the_writers_lock():
+    lock = threading.Lock()
+    publisher = SnapshotPublisher(lambda n: Snapshot(0, (("a", 1),)), lock)
+    seen = []
+    publisher.subscribe(lambda snapshot: seen.append((snapshot.version, lock.locked())))
+    publisher.publish()
+    publisher.publish()
+    assert seen == [(1, False), (2, False)]
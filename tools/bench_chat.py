@@ -0,0 +1,89 @@
+"""
+Throughput check for app.irc.ChatReader against a local stand-in IRC server,
+plus a parse-only comparison with twitchAPI's ChatMessage path.
+
+    poetry run python -m tools.bench_chat [lines]
+"""
+import asyncio
+import sys
+import time
+
+from app.irc import ChatReader, parse_privmsg
+
+# Tagged, as twitchAPI requests the tags capability; ChatReader simply skips them.
+TAGS = b"@badge-info=;badges=;color=#1E90FF;display-name={0};emotes=;first-msg=0;id=1;mod=0;room-id=1;subscriber=0;tmi-sent-ts=1700000000000;turbo=0;user-id=1;user-type= "
+SAMPLE = [
+    TAGS.replace(b"{0}", b"someuser") + b":someuser!someuser@someuser.tmi.twitch.tv PRIVMSG #gotgames_tb :one piece\r\n",
+    TAGS.replace(b"{0}", b"viewer42") + b":viewer42!viewer42@viewer42.tmi.twitch.tv PRIVMSG #gotgames_tb :!sug cowboy bebop pls\r\n",
+    TAGS.replace(b"{0}", b"another_one") + b":another_one!another_one@another_one.tmi.twitch.tv PRIVMSG #gotgames_tb :frieren\r\n",
+]
+
+
+async def serve_chat(lines: int) -> float:
+    """Run a stand-in server that answers JOIN, PINGs once and floods `lines` PRIVMSGs."""
+    received = 0
+    done = asyncio.Event()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        while not (await reader.readline()).startswith(b"JOIN"):
+            pass
+        writer.write(b"PING :tmi.twitch.tv\r\n")
+        assert (await reader.readline()).startswith(b"PONG")
+        batch = b"".join(SAMPLE) * 1000
+        for _ in range(lines // (len(SAMPLE) * 1000)):
+            writer.write(batch)
+            await writer.drain()
+        await done.wait()
+        writer.close()
+
+    def on_messages(messages):
+        nonlocal received
+        received += len(messages)
+        if received == total:
+            done.set()
+
+    total = lines // (len(SAMPLE) * 1000) * len(SAMPLE) * 1000
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    chat = ChatReader("gotgames_tb", on_messages, host="127.0.0.1", port=port)
+    task = asyncio.create_task(chat.run())
+    start = time.perf_counter()
+    await done.wait()
+    elapsed = time.perf_counter() - start
+    await chat.stop()
+    task.cancel()
+    server.close()
+    return total / elapsed
+
+
+def parse_rate(parse, lines: int) -> float:
+    start = time.perf_counter()
+    for i in range(lines):
+        parse(SAMPLE[i % len(SAMPLE)])
+    return lines / (time.perf_counter() - start)
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    print(f"ChatReader end-to-end: {asyncio.run(serve_chat(lines)):,.0f} msg/s")
+    print(f"parse_privmsg:         {parse_rate(parse_privmsg, lines):,.0f} msg/s")
+    try:
+        from twitchAPI.chat import Chat, ChatMessage
+    except ImportError:
+        print("twitchAPI not installed, skipping comparison")
+        return
+
+    chat = Chat.__new__(Chat)  # only the parsing helpers are used
+    chat._channel_command_prefix = {}
+    chat._prefix = "!"
+
+    def twitch_parse(line: bytes):
+        parsed = chat._parse_irc_message(line.decode().rstrip("\r\n"))
+        message = ChatMessage(None, parsed)
+        return message.user.name, message.text
+
+    print(f"twitchAPI ChatMessage: {parse_rate(twitch_parse, lines):,.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 import ast
+import hashlib
+import importlib
+import json
 import os
 import sys
+import threading
 from pathlib import Path
 from typing import Union
 from pydantic2ts import generate_typescript_defs
@@ -34,21 +38,86 @@ def py_to_ts(anno: str) -> str:
     """Map a parsed annotation name to its TS equivalent."""
     return _PRIM_MAP.get(anno, anno)
 
+# ─────────────────────────────────────────────
+#  Change detection
+# ─────────────────────────────────────────────
+
+CACHE_FILE = ".convert-cache.json"
+
+def _digest(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+def _load_cache(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+def write_if_changed(path: Union[str, Path], text: str) -> bool:
+    """Write `text` to `path` only if it differs, so watchers (Vite HMR) stay quiet."""
+    path = Path(path)
+    if path.exists() and path.read_text() == text:
+        return False
+    path.write_text(text)
+    return True
+
+def _module_name(src_path: Union[str, Path]) -> str:
+    return str(src_path).replace(".py", "").replace("/", ".").replace("\\", ".")
+
+def _generate_models(src_path: Union[str, Path], out_models: Path) -> bool:
+    """
+    Run pydantic2ts into a scratch file and only replace `out_models` if it changed.
+    Returns False when json2ts is missing, so the next run tries again.
+    """
+    module = _module_name(src_path)
+    # convert_live runs in a long-lived process: make sure json2ts sees the edited models
+    if module in sys.modules:
+        importlib.reload(sys.modules[module])
+
+    tmp = out_models.with_name(out_models.name + ".tmp")
+    try:
+        try:
+            generate_typescript_defs(module, str(tmp))
+        except Exception as e:
+            if 'json2ts' not in str(e):
+                raise e
+            print("json2ts not found, models.ts was not updated. Install it with:")
+            print("    pnpm add -g json-schema-to-typescript")
+            return False
+        write_if_changed(out_models, tmp.read_text())
+        return True
+    finally:
+        tmp.unlink(missing_ok=True)
+
 # ─────────────────────────────────────────────
 #  Main conversion routine
 # ─────────────────────────────────────────────
 
-def _convert(
-    src_path: Union[str, Path],
-    out_index: Union[str, Path],
-    out_dts:   Union[str, Path],
-    out_models: Union[str, Path],
-):
-    src = Path(src_path).read_text()
-    tree = ast.parse(src)
+def _is_exposed(m: ast.FunctionDef) -> bool:
+    """Detect any form of `@expose`."""
+    for dec in m.decorator_list:
+        # bare @expose
+        if isinstance(dec, ast.Name) and dec.id == 'expose':
+            return True
+        # @webview.expose or similar
+        elif isinstance(dec, ast.Attribute) and dec.attr == 'expose':
+            return True
+        # @expose(...)  decorator-call
+        elif isinstance(dec, ast.Call):
+            fn = dec.func
+            if isinstance(fn, ast.Name) and fn.id == 'expose':
+                return True
+            elif isinstance(fn, ast.Attribute) and fn.attr == 'expose':
+                return True
+    return False
 
+def _parse(tree: ast.Module) -> tuple[list[ast.ClassDef], list[tuple[str, str, str]]]:
     # 1) Collect Pydantic models (BaseModel subclasses)
-    models: dict[str, bool] = {}
+    models: list[ast.ClassDef] = []
     for node in tree.body:
         if not isinstance(node, ast.ClassDef):
             continue
@@ -60,7 +129,7 @@ def _convert(
             continue
 
         # It's a Pydantic model
-        models[node.name] = True
+        models.append(node)
 
     # 2) Collect exposed methods on ANY class
     funcs: list[tuple[str,str,str]] = []
@@ -69,27 +138,7 @@ def _convert(
             continue
 
         for m in node.body:
-            if not isinstance(m, ast.FunctionDef):
-                continue
-
-            # Detect any form of `@expose`:
-            is_exposed = False
-            for dec in m.decorator_list:
-                # bare @expose
-                if isinstance(dec, ast.Name) and dec.id == 'expose':
-                    is_exposed = True
-                # @webview.expose or similar
-                elif isinstance(dec, ast.Attribute) and dec.attr == 'expose':
-                    is_exposed = True
-                # @expose(...)  decorator-call
-                elif isinstance(dec, ast.Call):
-                    fn = dec.func
-                    if isinstance(fn, ast.Name) and fn.id == 'expose':
-                        is_exposed = True
-                    elif isinstance(fn, ast.Attribute) and fn.attr == 'expose':
-                        is_exposed = True
-
-            if not is_exposed:
+            if not isinstance(m, ast.FunctionDef) or not _is_exposed(m):
                 continue
 
             # Determine which arg is your payload:
@@ -117,12 +166,38 @@ def _convert(
 
             funcs.append((m.name, in_typ, out_typ))
 
+    return models, funcs
+
+def _convert(
+    src_path: Union[str, Path],
+    out_index: Union[str, Path],
+    out_dts:   Union[str, Path],
+    out_models: Union[str, Path],
+    force: bool = False,
+):
+    out_models = Path(out_models)
+    cache_path = out_models.with_name(CACHE_FILE)
+    cache = {} if force else _load_cache(cache_path)
+
+    tree = ast.parse(Path(src_path).read_text())
+    model_nodes, funcs = _parse(tree)
+    models = [node.name for node in model_nodes]
+
+    # Only the model classes and the exposed signatures affect the output;
+    # method bodies, comments and formatting do not.
+    models_key = _digest(*(ast.dump(node) for node in model_nodes))
+    api_key = _digest(*models, *(repr(f) for f in funcs))
+
+    if cache.get("models") == models_key and cache.get("api") == api_key \
+            and all(Path(p).exists() for p in (out_index, out_dts, out_models)):
+        return
+
     # 3) Generate interface/index.ts
     index_lines: list[str] = ["/* tslint:disable */", "/* eslint-disable */"]
 
     # -- wrapper functions
     if models:
-        model_list = ", ".join(models.keys())
+        model_list = ", ".join(models)
         index_lines.append(f"import type {{ {model_list} }} from './models';\n")
 
     for fn_name, in_t, out_t in funcs:
@@ -132,12 +207,12 @@ def _convert(
         index_lines.append(f"  return window.pywebview.api.{fn_name}(data);")
         index_lines.append("}\n")
 
-    Path(out_index).write_text("\n".join(index_lines))
+    write_if_changed(out_index, "\n".join(index_lines))
 
     # 4) Generate interface/interface.d.ts
     dts_lines: list[str] = ["/* tslint:disable */", "/* eslint-disable */"]
     if models:
-        model_list = ", ".join(models.keys())
+        model_list = ", ".join(models)
         dts_lines.append(f"import type {{ {model_list} }} from './models';\n")
 
     dts_lines.append("declare global {")
@@ -153,24 +228,18 @@ def _convert(
     dts_lines.append("  }")
     dts_lines.append("}\n")
 
-    Path(out_dts).write_text("\n".join(dts_lines))
+    write_if_changed(out_dts, "\n".join(dts_lines))
 
-    # 5) Generate interface/models.ts
-    try:
-        generate_typescript_defs(str(src_path).replace(".py", "").replace("/", ".").replace("\\", "."), out_models)
-    except Exception as e:
-        if 'json2ts' not in str(e):
-            raise e
-        else:
-            # exec "pnpm add -g json-schema-to-typescript"
-            print("json2ts not found, installing...")
-            os.system("pnpm add -g json-schema-to-typescript")
-            generate_typescript_defs(str(src_path).replace(".py", "").replace("/", ".").replace("\\", "."), out_models)
-    
+    # 5) Generate interface/models.ts (slow: imports the module and shells out to json2ts)
+    if cache.get("models") != models_key or not out_models.exists():
+        if not _generate_models(src_path, out_models):
+            models_key = None
+
+    cache_path.write_text(json.dumps({"models": models_key, "api": api_key}))
     print("Done!")
 
 
-def convert():
+def convert(force: bool = False):
     in_file = Path("app/interface.py")
     out_index = Path("interface/index.ts")
     out_dts = Path("interface/interface.d.ts")
@@ -178,33 +247,62 @@ def convert():
     out_index.parent.mkdir(parents=True, exist_ok=True)
     out_dts.parent.mkdir(parents=True, exist_ok=True)
     out_models.parent.mkdir(parents=True, exist_ok=True)
-    _convert(in_file, out_index, out_dts, out_models)
+    _convert(in_file, out_index, out_dts, out_models, force=force)
     
-def convert_live():
+def convert_live(debounce: float = 0.3):
     import watchdog.events
     import watchdog.observers
     
-    in_file = Path("app/interface.py")
+    in_file = Path("app/interface.py").resolve()
     
     class EventHandler(watchdog.events.FileSystemEventHandler):
         def __init__(self, callback):
             self.callback = callback
-            
-        def on_modified(self, event):
-            if event.src_path == in_file:
-                print("Interface file changed, converting...")
-                convert()
+            self.timer: threading.Timer | None = None
+            self.lock = threading.Lock()
+
+        def _schedule(self):
+            # Editors emit bursts of events per save: convert once they settle
+            with self.lock:
+                if self.timer is not None:
+                    self.timer.cancel()
+                self.timer = threading.Timer(debounce, self._fire)
+                self.timer.daemon = True
+                self.timer.start()
+
+        def _fire(self):
+            print("Interface file changed, converting...")
+            try:
+                self.callback()
+            except Exception as e:
+                print(f"Conversion failed: {e}")
+
+        # inotify also reports opened / closed_no_write, and converting reads
+        # the interface file itself: reacting to those would loop forever
+        WRITE_EVENTS = {
+            watchdog.events.EVENT_TYPE_MODIFIED,
+            watchdog.events.EVENT_TYPE_CREATED,
+            watchdog.events.EVENT_TYPE_MOVED,
+            watchdog.events.EVENT_TYPE_CLOSED,
+        }
+
+        def on_any_event(self, event):
+            if event.is_directory or event.event_type not in self.WRITE_EVENTS:
+                return
+            paths = [event.src_path, getattr(event, "dest_path", "")]
+            if any(p and Path(os.fsdecode(p)).resolve() == in_file for p in paths):
+                self._schedule()
     
     observer = watchdog.observers.Observer()
     event_handler = EventHandler(convert)
-    observer.schedule(event_handler, path=in_file.parent, recursive=False)
+    observer.schedule(event_handler, path=str(in_file.parent), recursive=False)
     observer.start()
 
     convert()
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Usage: python convert.py app/interface.py interface/index.ts interface/interface.d.ts")
+    if len(sys.argv) != 5:
+        print("Usage: python convert.py app/interface.py interface/index.ts interface/interface.d.ts interface/models.ts")
         sys.exit(1)
-    _convert(sys.argv[1], sys.argv[2], sys.argv[3])
+    _convert(sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4], force=True)
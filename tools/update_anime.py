@@ -1,55 +1,151 @@
 import random
 import sqlite3
+import sys
 import time
+from typing import Iterator, List, Optional, Protocol
 import requests
 
 DB_PATH = "assets/shows.db"
 API_URL = "https://graphql.anilist.co"
 
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
+class TitleIndex(Protocol):
+    def add_titles(
+        self,
+        titles: List[Optional[str]],
+        anime_id: int,
+        year: Optional[int] = None,
+        season: Optional[str] = None,
+        fmt: Optional[str] = None,
+    ) -> int: ...
+
+
+def normalize_alias(title: Optional[str]) -> str:
+    return title.strip().lower() if title else ""
+
+
+def init_db(path=DB_PATH):
+    conn = sqlite3.connect(path)
     c = conn.cursor()
     c.execute('''
         CREATE TABLE IF NOT EXISTS anime (
             id INTEGER PRIMARY KEY,
             title_romaji TEXT,
             title_english TEXT,
-            synonyms TEXT,
             start_year INTEGER,
             season TEXT,
             format TEXT,
             cover_image TEXT
         )
     ''')
+    # Every votable spelling of a show, already normalized, so readers load
+    # the whole index with one scan of the primary key.
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS anime_alias (
+            alias_norm TEXT PRIMARY KEY,
+            anime_id INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    columns = {row[1] for row in c.execute("PRAGMA table_info(anime)")}
+    if "synonyms" in columns:
+        migrate_synonyms(conn)
     conn.commit()
     return conn
 
 
+def migrate_synonyms(conn):
+    """
+    Move the legacy comma-joined `anime.synonyms` column into `anime_alias`.
+    The column was written with ", ".join, so split on exactly that separator.
+    """
+    c = conn.cursor()
+    print("Migrating synonyms into anime_alias...")
+    # Official titles first so a synonym of another show never shadows them
+    c.executemany(
+        "INSERT OR IGNORE INTO anime_alias VALUES (?, ?)",
+        (
+            (normalize_alias(title), anime_id)
+            for anime_id, romaji, english in c.execute("SELECT id, title_romaji, title_english FROM anime").fetchall()
+            for title in (romaji, english)
+            if normalize_alias(title)
+        ),
+    )
+    c.executemany(
+        "INSERT OR IGNORE INTO anime_alias VALUES (?, ?)",
+        (
+            (normalize_alias(title), anime_id)
+            for anime_id, synonyms in c.execute("SELECT id, synonyms FROM anime WHERE synonyms != ''").fetchall()
+            for title in synonyms.split(", ")
+            if normalize_alias(title)
+        ),
+    )
+    c.execute("ALTER TABLE anime DROP COLUMN synonyms")
+    conn.commit()
+
+
+def optimize_db(conn):
+    """Reclaim free pages and refresh planner statistics before shipping the DB."""
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.execute("VACUUM")
+
+
 def anime_exists(conn, anime_id):
     c = conn.cursor()
     c.execute("SELECT 1 FROM anime WHERE id = ?", (anime_id,))
     return c.fetchone() is not None
 
 
-def store_anime(conn, anime):
+def anime_titles(anime) -> List[Optional[str]]:
+    return [anime["title"].get("romaji"), anime["title"].get("english"), *anime.get("synonyms", [])]
+
+
+def is_official_alias(conn, alias: str) -> bool:
+    """Whether `alias` is held by a show whose romaji or english title it is."""
+    row = conn.execute(
+        "SELECT title_romaji, title_english FROM anime_alias JOIN anime ON anime.id = anime_id WHERE alias_norm = ?",
+        (alias,),
+    ).fetchone()
+    return row is not None and alias in map(normalize_alias, row)
+
+
+def store_anime(conn, anime, commit=True):
     c = conn.cursor()
     c.execute('''
         INSERT INTO anime (
-            id, title_romaji, title_english, synonyms,
+            id, title_romaji, title_english,
             start_year, season, format, cover_image
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (id) DO UPDATE SET
+            title_romaji = excluded.title_romaji,
+            title_english = excluded.title_english,
+            start_year = excluded.start_year,
+            season = excluded.season,
+            format = excluded.format,
+            cover_image = excluded.cover_image
     ''', (
         anime["id"],
         anime["title"].get("romaji"),
         anime["title"].get("english"),
-        ", ".join(anime.get("synonyms", [])),
         anime["startDate"].get("year"),
         anime.get("season"),
         anime.get("format"),
         anime["coverImage"].get("large") or anime["coverImage"].get("extraLarge")
     ))
-    conn.commit()
+    c.execute("DELETE FROM anime_alias WHERE anime_id = ?", (anime["id"],))
+    titles = anime_titles(anime)
+    # Same precedence as migrate_synonyms: an official title takes over an
+    # alias that another show only holds as a synonym.
+    for title in titles[:2]:
+        alias = normalize_alias(title)
+        if alias and not is_official_alias(conn, alias):
+            c.execute("INSERT OR REPLACE INTO anime_alias VALUES (?, ?)", (alias, anime["id"]))
+    c.executemany(
+        "INSERT OR IGNORE INTO anime_alias VALUES (?, ?)",
+        {(normalize_alias(title), anime["id"]) for title in titles[2:] if normalize_alias(title)},
+    )
+    if commit:
+        conn.commit()
 
 
 def fetch_anime_page(page):
@@ -119,30 +215,72 @@ def fetch_anime_page(page):
             time.sleep(wait_time)
 
 
-def sync():
-    conn = init_db()
-    page = 1
-    total_inserted = 0
-
+def iter_anime(start_page=1) -> Iterator[dict]:
+    """Fetch stage: yields shows newest-first, holding a single page in memory."""
+    page = start_page
     while True:
         animes = fetch_anime_page(page)
         if not animes:
-            break
-
-        for anime in animes:
-            if anime_exists(conn, anime["id"]):
-                print(f"Duplicate found: {anime['id']} — stopping update.")
-                conn.close()
-                return
-            store_anime(conn, anime)
+            return
+        yield from animes
+        page += 1
+
+
+def iter_new_anime(conn, animes: Iterator[dict]) -> Iterator[dict]:
+    """Stops the pipeline at the first show that is already in the database."""
+    for anime in animes:
+        if anime_exists(conn, anime["id"]):
+            print(f"Duplicate found: {anime['id']} — stopping update.")
+            return
+        yield anime
+
+
+def iter_stored(conn, animes: Iterator[dict], batch_size=50) -> Iterator[dict]:
+    """Upsert stage: commits every `batch_size` shows and passes them on."""
+    pending = 0
+    for anime in animes:
+        store_anime(conn, anime, commit=False)
+        pending += 1
+        if pending >= batch_size:
+            conn.commit()
+            pending = 0
+        yield anime
+    conn.commit()
+
+
+def sync(index: Optional[TitleIndex] = None):
+    """
+    fetch → skip known → upsert → index. When `index` is given (e.g. a running
+    VoteCounter) new titles become votable as soon as they are fetched.
+    """
+    conn = init_db()
+    total_inserted = 0
+
+    try:
+        for anime in iter_stored(conn, iter_new_anime(conn, iter_anime())):
+            if index is not None:
+                index.add_titles(
+                    anime_titles(anime),
+                    anime["id"],
+                    anime["startDate"].get("year"),
+                    anime.get("season"),
+                    anime.get("format"),
+                )
             total_inserted += 1
             print(f"Inserted anime {anime['id']} - {anime['title']['romaji']}")
+        if total_inserted:
+            optimize_db(conn)
+    finally:
+        conn.commit()
+        conn.close()
 
-        page += 1
-
-    conn.close()
     print(f"Update complete. Inserted {total_inserted} new entries.")
 
 
 if __name__ == "__main__":
-    sync()
+    if "--optimize" in sys.argv:
+        conn = init_db()
+        optimize_db(conn)
+        conn.close()
+    else:
+        sync()